@@ -0,0 +1,67 @@
+# encoding_bench – encode time and size of every PNG profile, per generator
+# -------------------------------------------------------------------------
+# Renders one representative poster per generator, then encodes it with
+# each profile in fcEncoding.PNG_PROFILES, plus the on-screen preview
+# (fcEncoding.encode_preview), and reports the median time and the byte
+# size.
+#
+#   python benchmarks/encoding_bench.py [--repeat 3] [--generator event]
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+os.chdir(REPO_DIR)  # renderers resolve fonts and images relative to the repo
+
+import fcAssetCache  # noqa: E402
+import fcEncoding  # noqa: E402
+
+
+def sample_posters():
+    import fcBlankSpaceRender
+    import fcEventRender
+    import fcTodayRender
+
+    return {
+        "today": lambda: fcTodayRender.render_poster("Fri, Oct 17, 2026", "10/17/2026"),
+        "event": lambda: fcEventRender.render_poster(
+            "Sherwood Park", "2025 Oak St", "T8A 0V9", "Saturday, October 18, 2026",
+            "1:00 PM – 3:00 PM", True, "Bring a pen", ""),
+        "blank_space": lambda: fcBlankSpaceRender.render_poster(
+            "Sign the petition here today!",
+            fcAssetCache.load_image(fcBlankSpaceRender.LOGO_PATH),
+            fcAssetCache.load_image(fcBlankSpaceRender.QR_PATH),
+            fcBlankSpaceRender.site_text, None),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PNG encoding profile benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--generator", action="append", choices=["today", "event", "blank_space"])
+    args = parser.parse_args(argv)
+
+    posters = sample_posters()
+    print("| generator | profile | encode (ms, median) | size (KB) |")
+    print("|---|---|---:|---:|")
+    for gen in args.generator or list(posters):
+        img = posters[gen]()
+        encoders = {profile: lambda img, p=profile: fcEncoding.encode_png(img, p)
+                    for profile in fcEncoding.PNG_PROFILES}
+        encoders[f"preview ({fcEncoding.PREVIEW_FORMAT.lower()})"] = fcEncoding.encode_preview
+        for profile, encode in encoders.items():
+            times, size = [], 0
+            for _ in range(args.repeat):
+                t = time.perf_counter()
+                size = len(encode(img))
+                times.append(time.perf_counter() - t)
+            print(f"| {gen} | {profile} | {statistics.median(times) * 1000:.0f} | {size / 1024:.0f} |")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
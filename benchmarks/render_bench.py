@@ -0,0 +1,298 @@
+# render_bench – per-stage render timings with a golden-image check
+# -----------------------------------------------------------------
+# Every case in benchmarks/corpus.json (fixed inputs per generator: short
+# and long text, long city names, empty optional fields) runs in a fresh
+# interpreter and reports:
+# - render:       render_poster, median of the warm repeats (first run = cold)
+# - fit:          time inside fcText.fit_font_to_width / fit_text_to_box
+#                 during one render (part of render)
+# - png:          fcEncoding.encode_png with the default profile
+# - pdf:          to_pdf_bytes_vector;  pdf-raster: the flat 300 DPI PDF
+# - peak memory:  growth of the process's peak RSS while running the case
+# Timings are compared with benchmarks/baseline.json (same machine only –
+# regenerate it with --update-baseline) and every poster is compared with
+# benchmarks/golden/<generator>-<case>.png, a downscaled copy of the
+# approved output, with a perceptual diff (blurred, per-pixel tolerance) so
+# anti-aliasing noise passes but any visible change fails.
+#
+#   python benchmarks/render_bench.py [--repeat 5] [--generator event]
+#   python benchmarks/render_bench.py --update-baseline --update-golden
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(REPO_DIR, "benchmarks")
+CORPUS_PATH = os.path.join(BENCH_DIR, "corpus.json")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+GOLDEN_DIR = os.path.join(BENCH_DIR, "golden")
+
+STAGES = ["render_cold", "render", "fit", "png", "pdf", "pdf_raster"]
+GOLDEN_MAX_SIDE = 640   # golden copies are stored at this size (longest side)
+GOLDEN_BLUR = 1.0       # px; absorbs sub-pixel anti-aliasing differences
+PIXEL_TOLERANCE = 16    # 0-255; smaller per-pixel differences are noise
+MAX_CHANGED_FRACTION = 0.00002  # ~6 px of a 640 px copy; more is a visible change
+DEFAULT_TOLERANCE = 0.25  # timing change vs the baseline worth flagging
+MIN_COMPARED = 2.0        # ms / MB; smaller values are too noisy to flag
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ----------------------------
+# Child: one case, fresh interpreter
+# ----------------------------
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _case_calls(generator, case):
+    """(render(), pdf()) for one corpus case."""
+    import fcAssetCache
+    import fcBlankSpaceRender
+    import fcEventRender
+    import fcTodayRender
+
+    if generator == "blank_space":
+        module = fcBlankSpaceRender
+        args = (case["free_text"],
+                fcAssetCache.load_image(module.LOGO_PATH) if case.get("logo") else None,
+                fcAssetCache.load_image(module.QR_PATH) if case.get("qr") else None,
+                case["site_text"], None)
+    else:
+        module = fcEventRender if generator == "event" else fcTodayRender
+        args = ()
+    return (module, lambda: module.render_poster(*args, **({} if args else case)),
+            lambda: module.to_pdf_bytes_vector(*args, **({} if args else case)))
+
+
+def run_case(generator, name, repeat, golden_out):
+    os.chdir(REPO_DIR)  # renderers resolve fonts and images relative to the repo
+    sys.path.insert(0, REPO_DIR)
+    import fcEncoding
+    import fcTemplates
+    import fcText
+    from PIL import Image
+
+    fit_time = [0.0]
+
+    def timed(fn):
+        def wrapper(*args, **kwargs):
+            t = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                fit_time[0] += time.perf_counter() - t
+        return wrapper
+
+    fcText.fit_font_to_width = timed(fcText.fit_font_to_width)
+    fcText.fit_text_to_box = timed(fcText.fit_text_to_box)
+
+    module, render, pdf = _case_calls(generator, load_corpus()[generator][name])
+    module.plan()  # compiling the template is a startup cost, not a render cost
+    rss_before = _peak_rss_mb()
+
+    def median_ms(fn, n=repeat):
+        times = []
+        for _ in range(n):
+            t = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t)
+        return statistics.median(times) * 1000
+
+    t = time.perf_counter()
+    img = render()
+    result = {"render_cold": (time.perf_counter() - t) * 1000}
+    fits = []
+
+    def render_once():
+        fit_time[0] = 0.0
+        render()
+        fits.append(fit_time[0] * 1000)
+
+    result["render"] = median_ms(render_once)
+    result["fit"] = statistics.median(fits)
+    result["png"] = median_ms(lambda: fcEncoding.encode_png(img))
+    result["pdf"] = median_ms(pdf)
+    result["pdf_raster"] = median_ms(lambda: fcTemplates.to_pdf_bytes_raster(img, module.PAGE_SIZE))
+    rss_after = _peak_rss_mb()
+    result["peak_mb"] = None if rss_before is None else rss_after - rss_before
+
+    small = img.convert("RGB")
+    small.thumbnail((GOLDEN_MAX_SIDE, GOLDEN_MAX_SIDE), Image.Resampling.LANCZOS)
+    small.save(golden_out, "PNG", optimize=True)
+    return result
+
+
+def measure(generator, name, repeat, golden_out):
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", generator, name,
+         "--repeat", str(repeat), "--golden-out", golden_out],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    lines = [ln for ln in proc.stdout.splitlines() if ln.startswith("{")]
+    if not lines:
+        return {"error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+    return json.loads(lines[-1])
+
+
+# ----------------------------
+# Golden images
+# ----------------------------
+
+def golden_diff(candidate_path, golden_path):
+    """(fraction of visibly changed pixels, mean difference 0-255, diff image) or None if no golden."""
+    from PIL import Image, ImageChops, ImageFilter
+
+    if not os.path.exists(golden_path):
+        return None
+    with Image.open(candidate_path) as a, Image.open(golden_path) as b:
+        a, b = a.convert("RGB"), b.convert("RGB")
+        if a.size != b.size:
+            return 1.0, 255.0, None
+        blur = ImageFilter.GaussianBlur(GOLDEN_BLUR)
+        diff = ImageChops.difference(a.filter(blur), b.filter(blur)).convert("L")
+    hist = diff.histogram()
+    total = a.width * a.height
+    changed = sum(hist[PIXEL_TOLERANCE + 1:]) / total
+    mean = sum(i * n for i, n in enumerate(hist)) / total
+    return changed, mean, diff
+
+
+# ----------------------------
+# Report
+# ----------------------------
+
+def machine():
+    return {"platform": platform.platform(), "python": platform.python_version(),
+            "cpus": os.cpu_count()}
+
+
+def fmt_change(value, base, tolerance):
+    if value is None:
+        return "–", False
+    text = f"{value:.1f}" if abs(value) < 10 else f"{value:.0f}"
+    if not base or max(value, base) < MIN_COMPARED:
+        return text, False
+    ratio = value / base
+    if ratio > 1 + tolerance:
+        return f"{text} ⚠️ +{(ratio - 1) * 100:.0f}%", True
+    if ratio < 1 - tolerance:
+        return f"{text} (−{(1 - ratio) * 100:.0f}%)", False
+    return text, False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render benchmark with golden-image regression")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--generator", action="append", choices=["today", "event", "blank_space"])
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="flag timings this much slower than the baseline (default 0.25 = 25%%)")
+    parser.add_argument("--strict", action="store_true", help="exit non-zero on timing regressions too")
+    parser.add_argument("--update-baseline", action="store_true", help="store these timings as the baseline")
+    parser.add_argument("--update-golden", action="store_true", help="accept these posters as the golden images")
+    parser.add_argument("--json", action="store_true", help="print raw JSON instead of a table")
+    parser.add_argument("--child", nargs=2, metavar=("GENERATOR", "CASE"), help=argparse.SUPPRESS)
+    parser.add_argument("--golden-out", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_case(*args.child, args.repeat, args.golden_out)))
+        return 0
+
+    corpus = load_corpus()
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            stored = json.load(f)
+        baseline = stored.get("results", {})
+        if stored.get("machine") != machine() and not args.json:
+            print("ℹ️ The baseline was recorded on another machine; timing changes are only indicative.")
+
+    results, golden_failures, slower = {}, [], []
+    with tempfile.TemporaryDirectory(prefix="fc_bench_") as tmp:
+        for generator in args.generator or list(corpus):
+            for name in corpus[generator]:
+                case = f"{generator}/{name}"
+                candidate = os.path.join(tmp, f"{generator}-{name}.png")
+                result = results[case] = measure(generator, name, args.repeat, candidate)
+                if "error" in result:
+                    golden_failures.append(case)
+                    continue
+                golden_path = os.path.join(GOLDEN_DIR, f"{generator}-{name}.png")
+                if args.update_golden:
+                    os.makedirs(GOLDEN_DIR, exist_ok=True)
+                    os.replace(candidate, golden_path)
+                    result["golden"] = "updated"
+                    continue
+                diff = golden_diff(candidate, golden_path)
+                if diff is None:
+                    result["golden"] = "missing"
+                    continue
+                changed, mean, diff_img = diff
+                result["golden"] = {"changed": changed, "mean": mean}
+                if changed > MAX_CHANGED_FRACTION:
+                    golden_failures.append(case)
+                    if diff_img is not None:
+                        diff_path = os.path.join(tempfile.gettempdir(), f"fc_bench_diff-{generator}-{name}.png")
+                        diff_img.point(lambda v: 255 if v > PIXEL_TOLERANCE else v * 4).save(diff_path)
+                        result["golden"]["diff_image"] = diff_path
+
+    if args.json:
+        print(json.dumps({"machine": machine(), "results": results}, indent=2))
+    else:
+        print("| case | " + " | ".join(f"{s} (ms)" for s in STAGES) + " | peak RSS (MB) | golden |")
+        print("|---|" + "---:|" * (len(STAGES) + 1) + "---|")
+        for case, r in results.items():
+            if "error" in r:
+                print(f"| {case} | " + " | ".join("–" for _ in STAGES) + f" | – | ❌ {r['error']} |")
+                continue
+            base = baseline.get(case, {})
+            cells = []
+            for stage in STAGES + ["peak_mb"]:
+                text, worse = fmt_change(r.get(stage), base.get(stage), args.tolerance)
+                cells.append(text)
+                if worse and stage != "render_cold":
+                    slower.append(f"{case} {stage}")
+            golden = r.get("golden")
+            if isinstance(golden, dict):
+                mark = "❌" if case in golden_failures else "✅"
+                golden = f"{mark} {golden['changed'] * 100:.3f}% changed"
+                if "diff_image" in r["golden"]:
+                    golden += f" ({r['golden']['diff_image']})"
+            print(f"| {case} | " + " | ".join(cells) + f" | {golden} |")
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine(), "repeat": args.repeat,
+                       "results": {case: {k: round(v, 2) for k, v in r.items()
+                                          if k != "golden" and v is not None}
+                                   for case, r in results.items() if "error" not in r}},
+                      f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"📝 Baseline written to {os.path.relpath(BASELINE_PATH, REPO_DIR)}")
+
+    if golden_failures:
+        print(f"❌ Output changed or failed: {', '.join(golden_failures)}")
+    if slower:
+        print(f"⚠️ Slower than the baseline: {', '.join(slower)}")
+    return 1 if golden_failures or (args.strict and slower) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
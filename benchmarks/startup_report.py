@@ -0,0 +1,85 @@
+# startup_report – cold-start and warm-rerun time of every Streamlit page
+# -----------------------------------------------------------------------
+# Each page runs in a fresh interpreter (Streamlit's AppTest harness):
+# - cold:  first script run, including imports of our modules
+# - warm:  median of the following reruns (what every widget change costs)
+# Also reports whether reportlab was imported during those runs – it should
+# only load once a PDF is actually produced.
+#
+#   python benchmarks/startup_report.py [--reruns 5] [--json]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = [
+    "fcAssetGenerator.py",
+    "fcLogos.py",
+    "fcPosters.py",
+    "fcEventPosterGenerator.py",
+    "fcTodayPoster.py",
+    "fcBlankSpacePoster.py",
+]
+
+_CHILD = r"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+page, reruns = sys.argv[1], int(sys.argv[2])
+at = AppTest.from_file(page, default_timeout=600)
+t = time.perf_counter(); at.run(); cold = time.perf_counter() - t
+warm = []
+for _ in range(reruns):
+    t = time.perf_counter(); at.run(); warm.append(time.perf_counter() - t)
+print(json.dumps({
+    "cold": cold,
+    "warm": warm,
+    "errors": [e.message for e in at.exception],
+    "reportlab_loaded": any(m.startswith("reportlab") for m in sys.modules),
+}))
+"""
+
+
+def measure(page, reruns):
+    proc = subprocess.run(
+        [sys.executable, "-c", _CHILD, os.path.join(REPO_DIR, page), str(reruns)],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    lines = [ln for ln in proc.stdout.splitlines() if ln.startswith("{")]
+    if not lines:
+        return {"page": page, "error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+    result = json.loads(lines[-1])
+    result["page"] = page
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print raw JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    results = [measure(page, args.reruns) for page in PAGES]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"| page | cold start (ms) | warm rerun (ms, median of {args.reruns}) | reportlab loaded | errors |")
+    print("|---|---:|---:|:---:|---|")
+    for r in results:
+        if "error" in r:
+            print(f"| {r['page']} | – | – | – | {r['error']} |")
+            continue
+        warm = statistics.median(r["warm"]) * 1000 if r["warm"] else float("nan")
+        errors = "; ".join(e.splitlines()[0] for e in r["errors"]) or ""
+        print(f"| {r['page']} | {r['cold'] * 1000:.0f} | {warm:.0f} | "
+              f"{'yes' if r['reportlab_loaded'] else 'no'} | {errors} |")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
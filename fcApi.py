@@ -0,0 +1,329 @@
+# fcApi – local HTTP service for the poster generators (no Streamlit needed)
+# -------------------------------------------------------------------------
+# Lets other tools (a scheduling sheet, a chat bot) make posters without the
+# UI. Runs offline: only the bundled fonts, images and templates are used.
+#
+#   python fcApi.py [--host 127.0.0.1] [--port 8502] [--workers 4]
+#
+#   POST /posters/<generator>.<format>   JSON row -> poster bytes
+#   GET  /posters/<generator>.<format>?city=...&date=...   (same, from the query)
+#   POST /batch/<generator>.pdf          JSON list of rows -> one multi-page PDF (streamed)
+#   GET  /health                         generators, formats and queue stats
+#   GET  /metrics                        fcTrace histograms (Prometheus text)
+#
+# Generators: event, today, blank_space. Formats: png, png-fast,
+# png-balanced, png-smallest, pdf, pdf-raster. Rows take the same fields as
+# fcassets.py CSV/JSON rows (e.g. {"city": "Red Deer", "date": "2026-10-18",
+# "start_time": "13:00", "end_time": "15:00"}); "dpi" sets the raster
+# resolution.
+#
+# Every poster response carries an ETag – its fcRenderCache key, computed
+# from the normalized inputs without rendering – so a client or proxy that
+# sends If-None-Match gets a 304 with no render at all. Renders run on an
+# fcRenderService process pool: the queue is bounded (503 when full), each
+# client may have PER_CLIENT posters in flight (429 beyond that), and
+# identical requests arriving together share one render.
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import fcCanvas
+import fcEncoding
+import fcPrewarm
+import fcRenderService
+import fcTrace
+import fcassets
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = int(os.environ.get("FC_API_PORT", 8502))
+PER_CLIENT = 4            # posters in flight per client address
+RENDER_TIMEOUT = 300.0    # seconds a request waits for its poster
+MAX_BODY = 1_000_000      # bytes of JSON accepted per request
+MAX_BATCH_ROWS = 1000
+BATCH_LIMIT = 2           # batch PDFs streamed at once (drawn in the request thread)
+DPI_RANGE = (36, 1200)
+RETRY_AFTER = "5"
+
+
+class ApiError(Exception):
+    """An HTTP error response: status code and message."""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+#%% Requests -> render arguments
+
+def _module(generator):
+    if generator not in fcassets.GENERATORS:
+        raise ApiError(404, f"unknown generator {generator!r}; try one of {sorted(fcassets.GENERATORS)}")
+    return importlib.import_module(fcassets.GENERATORS[generator])
+
+
+def parse_target(name, query):
+    """'event.pdf' (or 'event' + ?format=pdf) -> (generator, format)."""
+    generator, _, fmt = name.partition(".")
+    fmt = fmt or query.get("format") or "png"
+    if fmt not in fcassets.FORMATS:
+        raise ApiError(404, f"unknown format {fmt!r}; try one of {fcassets.FORMATS}")
+    return generator, fmt
+
+
+def parse_dpi(value, fmt):
+    if fmt == "pdf" or value in (None, ""):
+        return fcCanvas.PAGE_DPI  # the vector PDF has no resolution
+    try:
+        dpi = int(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"dpi must be a whole number, got {value!r}")
+    if not DPI_RANGE[0] <= dpi <= DPI_RANGE[1]:
+        raise ApiError(400, f"dpi must be between {DPI_RANGE[0]} and {DPI_RANGE[1]}")
+    return dpi
+
+
+def row_kwargs(generator, row):
+    """render_poster_cached arguments for one row, parsed like fcassets.py rows."""
+    module = _module(generator)
+    if not isinstance(row, dict):
+        raise ApiError(400, "each row must be a JSON object")
+    try:
+        return fcassets.ROW_PARSERS[generator](row, module)
+    except ValueError as e:
+        raise ApiError(400, str(e))
+
+
+def etag(key):
+    return f'"{key}"'
+
+
+def etag_matches(header, tag):
+    if not header:
+        return False
+    candidates = [part.strip() for part in header.split(",")]
+    return "*" in candidates or tag in (c[2:] if c.startswith("W/") else c for c in candidates)
+
+
+#%% Server
+
+class PosterServer(ThreadingHTTPServer):
+    """One thread per connection in front of a shared render pool."""
+
+    daemon_threads = True
+
+    def __init__(self, address, workers=fcRenderService.DEFAULT_WORKERS):
+        super().__init__(address, Handler)
+        self.renders = fcRenderService.RenderService(workers=workers, per_session=PER_CLIENT)
+        self.batches = threading.BoundedSemaphore(BATCH_LIMIT)
+        self._lock = threading.Lock()
+        self._inflight = {}  # cache key -> Ticket, so identical requests share a render
+
+    def poster(self, client, generator, kwargs, fmt, dpi, key):
+        """Encoded poster bytes; waits for the render pool."""
+        with self._lock:
+            ticket = self._inflight.get(key)
+            if ticket is None:
+                try:
+                    # ROW_PARSERS return render_poster_cached's arguments in order
+                    ticket = self.renders.submit_poster(client, key, generator, tuple(kwargs.values()),
+                                                        kinds=(fmt,), dpi=dpi)[fmt]
+                except fcRenderService.SessionBusy:
+                    raise ApiError(429, f"at most {PER_CLIENT} posters in flight per client",
+                                   {"Retry-After": "1"})
+                except fcRenderService.ServiceBusy:
+                    raise ApiError(503, "the render queue is full", {"Retry-After": RETRY_AFTER})
+                if not ticket.done():  # already-cached posters come back finished
+                    self._inflight[key] = ticket
+                    ticket.future.add_done_callback(lambda _, k=key: self._forget(k))
+        try:
+            return ticket.result(RENDER_TIMEOUT)
+        except fcRenderService.QueueTimeout:
+            raise ApiError(503, "waited too long for a free renderer", {"Retry-After": RETRY_AFTER})
+        except TimeoutError:
+            raise ApiError(504, "the poster took too long to render")
+
+    def _forget(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def server_close(self):
+        super().server_close()
+        self.renders.shutdown()
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "fcApi/1"
+    protocol_version = "HTTP/1.1"
+
+    # ----- routing
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _handle(self, method):
+        url = urlsplit(self.path)
+        query = dict(parse_qsl(url.query))
+        parts = [p for p in url.path.split("/") if p]
+        try:
+            if parts == ["health"] and method == "GET":
+                self._send_json(200, {"ok": True, "generators": sorted(fcassets.GENERATORS),
+                                      "formats": fcassets.FORMATS, "queue": self.server.renders.stats()})
+            elif parts == ["metrics"] and method == "GET":
+                self._send(200, fcTrace.prometheus_text().encode("utf-8"),
+                           "text/plain; version=0.0.4; charset=utf-8")
+            elif len(parts) == 2 and parts[0] == "posters":
+                row = query if method == "GET" else self._read_json()
+                self._poster(parts[1], query, row)
+            elif len(parts) == 2 and parts[0] == "batch" and method == "POST":
+                self._batch(parts[1], query, self._read_json())
+            else:
+                raise ApiError(404, "not found; see GET /health")
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)}, e.headers)
+        except Exception as e:
+            self.log_error("render failed: %r", e)
+            self._send_json(500, {"error": f"render failed: {e}"})
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            raise ApiError(400, "bad Content-Length")
+        if length > MAX_BODY:
+            raise ApiError(413, f"request body over {MAX_BODY} bytes")
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            raise ApiError(400, f"invalid JSON: {e}")
+
+    # ----- endpoints
+
+    def _poster(self, name, query, row):
+        generator, fmt = parse_target(name, query)
+        row = dict(row) if isinstance(row, dict) else row
+        dpi = parse_dpi(query.get("dpi") or (row.pop("dpi", None) if isinstance(row, dict) else None), fmt)
+        kwargs = row_kwargs(generator, row)
+        key = _module(generator).cache_key(**kwargs, fmt=fmt, dpi=dpi)
+        tag = etag(key)
+        headers = {"ETag": tag, "Cache-Control": "no-cache"}
+        if etag_matches(self.headers.get("If-None-Match"), tag):
+            self._send(304, b"", None, headers)
+            return
+        data = self.server.poster(self.client_address[0], generator, kwargs, fmt, dpi, key)
+        stem = fcassets.output_stem(generator, None, kwargs)
+        headers["Content-Disposition"] = f'inline; filename="{stem}.{fcEncoding.file_extension(fmt)}"'
+        self._send(200, data, fcEncoding.mime_type(fmt), headers)
+
+    def _batch(self, name, query, rows):
+        generator, fmt = parse_target(name, query)
+        if fmt != "pdf":
+            raise ApiError(404, "batches are vector PDFs: POST /batch/<generator>.pdf")
+        if isinstance(rows, dict):
+            rows = rows.get("events") or rows.get("rows") or []
+        if not isinstance(rows, list) or not rows:
+            raise ApiError(400, "send a non-empty JSON list of rows")
+        if len(rows) > MAX_BATCH_ROWS:
+            raise ApiError(413, f"at most {MAX_BATCH_ROWS} rows per batch")
+        module = _module(generator)
+        batch = [row_kwargs(generator, row) for row in rows]
+        # The batch is identified by its pages' keys, in order
+        digest = hashlib.sha256()
+        for kwargs in batch:
+            digest.update(module.cache_key(**kwargs, fmt="pdf").encode("ascii"))
+        tag = etag(digest.hexdigest())
+        headers = {"ETag": tag, "Cache-Control": "no-cache"}
+        if etag_matches(self.headers.get("If-None-Match"), tag):
+            self._send(304, b"", None, headers)
+            return
+        if not self.server.batches.acquire(blocking=False):
+            raise ApiError(503, "too many batch PDFs in progress", {"Retry-After": RETRY_AFTER})
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Content-Disposition", f'inline; filename="{generator}_batch.pdf"')
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            out = _ChunkedWriter(self.wfile)
+            module.write_batch_pdf(out, batch)
+            out.close()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # the client went away mid-stream
+        except Exception as e:
+            # Headers are sent: end the stream unterminated so the client sees a failure
+            self.log_error("batch PDF failed: %r", e)
+            self.close_connection = True
+        finally:
+            self.server.batches.release()
+
+    # ----- responses
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+
+class _ChunkedWriter:
+    """File-like `write` that frames each write as an HTTP/1.1 chunk."""
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+
+    def write(self, data):
+        if data:
+            self._wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        return len(data)
+
+    def close(self):
+        self._wfile.write(b"0\r\n\r\n")
+
+
+#%% CLI
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="fcApi", description="Local HTTP service for Forever Canadian posters")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port (default: {DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, default=fcRenderService.DEFAULT_WORKERS,
+                        help="render worker processes (default: one per CPU; 0 renders in-process)")
+    args = parser.parse_args(argv)
+
+    # Asset and font paths in the renderers are relative to the repo
+    os.chdir(fcassets.REPO_DIR)
+    server = PosterServer((args.host, args.port), workers=args.workers)
+    fcPrewarm.start(server.renders)  # the Today posters of the coming days, while idle
+    print(f"🖨️ Poster API on http://{args.host}:{args.port} ({server.renders.workers} worker(s)); "
+          f"try GET /health")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Stopping.")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
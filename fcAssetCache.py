@@ -0,0 +1,280 @@
+# fcAssetCache – decoded / pre-fitted image assets shared by the generators
+# -------------------------------------------------------------------------
+# - Bundled images are decoded lazily, once per process, and shared across
+#   Streamlit reruns and sessions (and by headless callers)
+# - Expensive, input-independent image work (e.g. LANCZOS-fitting the Event
+#   background to the full page) is done once per process
+# - Decoded images and fitted backgrounds are stored once as raw pixel
+#   files under FC_CACHE_DIR (in Pillow's own memory layout) and memory-
+#   mapped read-only: every process and render worker attaches to the same
+#   pages zero-copy instead of decoding or resampling again
+# - Entries are keyed by the source file's mtime/size and the target size,
+#   so editing background.png or changing the page size invalidates them
+# - Resized logo/QR variants are kept per (asset, size, filter); the QR is
+#   scaled nearest-neighbour to a whole number of pixels per module
+# - Callers always get a copy of pre-fitted backgrounds; resized variants
+#   are shared and must only be pasted, never drawn on
+# - scaled_variant re-derives a variant at another render scale from the
+#   original asset, so drafts and high-DPI prints don't resample twice
+
+import hashlib
+import itertools
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageOps
+
+import fcTrace
+
+CACHE_DIR = os.environ.get("FC_CACHE_DIR", ".fc_cache")
+ASSET_CACHE_DIR = os.path.join(CACHE_DIR, "assets")
+
+VARIANT_CACHE_SIZE = 32
+
+_lock = threading.Lock()
+_decoded: dict = {}  # (abs path, mode) -> (file stamp, Image)
+_fitted: dict = {}  # (abs path, size, centering) -> (file stamp, Image)
+_variants: OrderedDict = OrderedDict()  # (id(src), size, resample) -> (src, Image)
+_origins: dict = {}  # id(variant) -> its _variants key
+_qr_grids: OrderedDict = OrderedDict()  # id(src) -> (src, (pixels per module, modules incl. quiet zone) or None)
+
+
+def file_stamp(path):
+    """(mtime_ns, size) of `path`, used to notice when an asset changes."""
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+# --------------------
+# Shared pixel store: raw files mapped read-only by every process
+# --------------------
+
+# Stored layout per requested mode. Pillow can only map buffers in its own
+# layout, and keeps RGB as 4 bytes per pixel, so RGB is stored as RGBX.
+_STORE_MODES = {"RGBA": "RGBA", "L": "L", "RGB": "RGBX"}
+_BYTES_PER_PIXEL = {"RGBA": 4, "RGBX": 4, "L": 1}
+
+
+def _raw_path(kind, token, size):
+    name = hashlib.sha1(repr(token).encode("utf-8")).hexdigest()
+    return os.path.join(ASSET_CACHE_DIR, f"{kind}_{size[0]}x{size[1]}_{name}.raw")
+
+
+def _map_raw(raw_path, mode, size):
+    # Read-only image over the file's pages; Pillow copies it before any write
+    try:
+        with open(raw_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size != size[0] * size[1] * _BYTES_PER_PIXEL[mode]:
+                return None
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    return Image.frombuffer(mode, size, buf, "raw", mode, 0, 1)
+
+
+def _write_raw(raw_path, img):
+    # Write-then-rename so concurrent processes never read a partial file
+    try:
+        os.makedirs(os.path.dirname(raw_path), exist_ok=True)
+        tmp = f"{raw_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(img.tobytes())
+        os.replace(tmp, raw_path)
+        return True
+    except OSError:
+        return False  # disk cache is best-effort
+
+
+def shared_pixels(kind, token, mode, size, make) -> Image.Image:
+    """
+    Immutable image for `token` (anything identifying the pixels, including
+    the source file's stamp), memory-mapped from the pixel store. `make()`
+    produces it on the first request from any process. RGB comes back as
+    RGBX (same pixels, Pillow's layout); convert("RGB") for a drawable copy.
+    """
+    store_mode = _STORE_MODES[mode]
+    raw_path = _raw_path(kind, token, size)
+    img = _map_raw(raw_path, store_mode, size)
+    if img is None:
+        img = make()
+        if img.mode != store_mode:
+            img = img.convert(store_mode)
+        if _write_raw(raw_path, img):
+            img = _map_raw(raw_path, store_mode, size) or img
+    return img
+
+
+def load_image(path, mode="RGBA") -> Image.Image:
+    """
+    Decoded bundled image, converted to `mode`. Decoded once per file
+    version across all processes (see shared_pixels) and mapped zero-copy
+    for RGBA and L. The image is shared: paste or resize it, never draw on it.
+    """
+    key = (os.path.abspath(path), mode)
+    stamp = file_stamp(path)
+    with _lock:
+        hit = _decoded.get(key)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+
+    def decode():
+        with Image.open(path) as src:
+            return src.convert(mode)
+
+    with Image.open(path) as src:
+        size = src.size  # header only
+    img = shared_pixels("img", (key, stamp), mode, size, decode)
+    if img.mode != mode:
+        img = img.convert(mode)  # RGB: one private copy per process
+    with _lock:
+        _decoded[key] = (stamp, img)
+    return img
+
+
+@fcTrace.timed("background.fit")
+def fitted_background(path, size, centering=(0.5, 0.5)) -> Image.Image:
+    """
+    Return a copy of `path` center-cropped and LANCZOS-fitted to `size` (RGB).
+    The fit runs at most once per (file version, size) across processes;
+    the result is mapped from the pixel store, and only the copy is private.
+    """
+    size = (int(size[0]), int(size[1]))
+    key = (os.path.abspath(path), size, tuple(centering))
+    stamp = file_stamp(path)
+    with _lock:
+        hit = _fitted.get(key)
+    if hit is not None and hit[0] == stamp:
+        return hit[1].convert("RGB")
+
+    def fit():
+        with Image.open(path) as src:
+            bg = src.convert("RGB")
+        return ImageOps.fit(bg, size, method=Image.Resampling.LANCZOS, centering=centering)
+
+    fitted = shared_pixels("bg", (key, stamp), "RGB", size, fit)
+    with _lock:
+        _fitted[key] = (stamp, fitted)
+    return fitted.convert("RGB")
+
+
+def resized_variant(img: Image.Image, size, resample=Image.Resampling.BICUBIC) -> Image.Image:
+    """
+    `img.resize(size, resample)`, computed once per (image, size, filter).
+    Sources are keyed by identity and pinned by the cache entry.
+    """
+    size = (max(1, int(size[0])), max(1, int(size[1])))
+    key = (id(img), size, resample)
+    with _lock:
+        hit = _variants.get(key)
+        if hit is not None:
+            _variants.move_to_end(key)
+            return hit[1]
+    with fcTrace.span("image.resize"):
+        resized = img.resize(size, resample)
+    with _lock:
+        _variants[key] = (img, resized)
+        _origins[id(resized)] = key
+        while len(_variants) > VARIANT_CACHE_SIZE:
+            _, (_, evicted) = _variants.popitem(last=False)
+            _origins.pop(id(evicted), None)
+    return resized
+
+
+def scaled_variant(img: Image.Image, scale: float) -> Image.Image:
+    """
+    `img` resized by `scale` (for drawing a layout at another resolution).
+    A cached variant is re-derived from its original asset with the same
+    filter: a 600 DPI logo comes from the full-resolution file, and a QR
+    stays nearest-neighbour while its modules still land on whole pixels.
+    """
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    with _lock:
+        key = _origins.get(id(img))
+        entry = _variants.get(key) if key is not None else None
+    if entry is None or entry[1] is not img:
+        # Not one of ours (e.g. a placeholder): plain resize, not cached
+        return img.resize(size, Image.Resampling.LANCZOS if scale < 1 else Image.Resampling.BICUBIC)
+    src, resample = entry[0], key[2]
+    if resample == Image.Resampling.NEAREST:
+        grid = qr_grid(src)
+        if grid is None or size[0] % grid[1]:
+            resample = Image.Resampling.LANCZOS
+    return resized_variant(src, size, resample)
+
+
+def fit_variant(img: Image.Image, max_w, max_h, upscale=True, resample=Image.Resampling.BICUBIC):
+    """Aspect-preserving resize into (max_w x max_h), cached like resized_variant."""
+    ratio = min(max_w / img.width, max_h / img.height)
+    if not upscale:
+        ratio = min(ratio, 1.0)
+    if ratio <= 0:
+        ratio = 1.0
+    return resized_variant(img, (int(img.width * ratio), int(img.height * ratio)), resample)
+
+
+def _detect_qr_grid(img):
+    # Find a row crossing the top-left finder pattern: its runs read
+    # dark/light/dark/light/dark in a 1:1:3:1:1 ratio and span 7 modules.
+    # Works for styled QRs with rounded modules too.
+    gray = img.convert("L")
+    bbox = gray.point(lambda v: 255 if v < 128 else 0).getbbox()
+    if bbox is None or img.width != img.height:
+        return None
+    x0, y0, x1, y1 = bbox
+    finder_w = None
+    for y in range(y0, y0 + (y1 - y0) // 3):
+        row = gray.crop((x0, y, x1, y + 1)).tobytes()
+        runs = [(dark, len(list(g))) for dark, g in itertools.groupby(row, key=lambda v: v < 128)]
+        if len(runs) < 5 or not runs[0][0]:
+            continue
+        lens = [n for _, n in runs[:5]]
+        unit = sum(lens) / 7
+        if all(abs(n - k * unit) <= max(1.0, 0.5 * unit) for n, k in zip(lens, (1, 1, 3, 1, 1))):
+            finder_w = sum(lens)
+            break
+    if finder_w is None:
+        return None
+    n = round((x1 - x0) / (finder_w / 7))
+    n = 21 + 4 * max(0, round((n - 21) / 4))  # QR sizes are 21, 25, ... modules
+    px = (x1 - x0) / n
+    total = img.width / px
+    if abs(px - round(px)) > 0.05 or abs(total - round(total)) > 0.05:
+        return None
+    return round(px), round(total)
+
+
+def qr_grid(img: Image.Image):
+    """(pixels per module, modules including quiet zone) of a square QR image, or None."""
+    key = id(img)
+    with _lock:
+        hit = _qr_grids.get(key)
+        if hit is not None and hit[0] is img:
+            _qr_grids.move_to_end(key)
+            return hit[1]
+    hit = (img, _detect_qr_grid(img))
+    with _lock:
+        _qr_grids[key] = hit
+        while len(_qr_grids) > VARIANT_CACHE_SIZE:  # bounded like the variants: sources are pinned
+            _qr_grids.popitem(last=False)
+    return hit[1]
+
+
+def fit_qr(img: Image.Image, max_w, max_h, upscale=True) -> Image.Image:
+    """
+    QR code scaled nearest-neighbour to the largest whole number of pixels
+    per module that fits (max_w x max_h), so modules stay crisp. Falls back
+    to an ordinary cached resize when no module grid can be detected.
+    """
+    grid = qr_grid(img)
+    if grid is None:
+        return fit_variant(img, max_w, max_h, upscale=upscale)
+    module_px, modules = grid
+    per_module = int(min(max_w, max_h) // modules)
+    if not upscale:
+        per_module = min(per_module, module_px)
+    if per_module < 1:
+        return fit_variant(img, max_w, max_h, upscale=upscale)
+    side = per_module * modules
+    return resized_variant(img, (side, side), Image.Resampling.NEAREST)
@@ -1,11 +1,9 @@
 #%% Import Packages
-import io
-import datetime
-from PIL import Image, ImageOps, ImageDraw, ImageFont
 import streamlit as st
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.utils import ImageReader
+
+import fcTrace
+
+fcTrace.start_metrics_server()  # Prometheus text at /metrics when FC_METRICS_PORT is set
 
 pages = {
     "Pre-Made Assets": [
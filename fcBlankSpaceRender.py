@@ -0,0 +1,129 @@
+# fcBlankSpaceRender – headless Free-Writing poster renderer
+# ----------------------------------------------------------
+# What this does
+# - Renders a landscape poster with a thick red border
+# - A red horizontal divider splits the page in half
+# - TOP HALF: free writing text, word-wrapped and auto-sized up to 300px
+# - BOTTOM HALF: Forever Canadian logo on the left; QR code + website right
+#
+# The layout lives in templates/blank_space.json (see fcTemplates). Logo,
+# QR, site text and font are static inputs, so everything but the free
+# text comes from a cached layer.
+#
+# No Streamlit dependency: imported by the fcBlankSpacePoster page, the
+# fcassets batch CLI and anything else that needs posters in bulk.
+
+from PIL import Image
+
+import fcAssetCache
+import fcCanvas
+import fcFonts
+import fcPdfBatch
+import fcTemplates
+
+# --------------------
+# Global poster settings
+# --------------------
+# Layout is in page units (1/300 in); render_poster(dpi=...) scales it
+TEMPLATE = "blank_space"
+POSTER_WIDTH = 3300    # 11"
+POSTER_HEIGHT = 2550   # 8.5"
+PAGE_SIZE = (POSTER_WIDTH, POSTER_HEIGHT)
+
+site_text = "forever-canadian.ca"
+LOGO_PATH = "Forever Canadian No Background.png"
+QR_PATH = "qrcode.png"
+
+
+def plan() -> fcTemplates.Plan:
+    return fcTemplates.load_plan(TEMPLATE)
+
+
+def _inputs(free_text, logo_img, qr_img, site_text, font_file) -> dict:
+    return {"free_text": free_text or "", "logo": logo_img, "qr": qr_img,
+            "site_text": site_text or "", "font_file": font_file}
+
+
+# --------------------
+# Poster rendering
+# --------------------
+
+def render_poster(
+    free_text: str,
+    logo_img: Image.Image | None,
+    qr_img: Image.Image | None,
+    site_text: str,
+    font_file,  # Uploaded font file or None
+    dpi: int = fcCanvas.PAGE_DPI,
+) -> Image.Image:
+    # Only the free text is drawn per request, on a copy of the static layer
+    return plan().render(_inputs(free_text, logo_img, qr_img, site_text, font_file), dpi=dpi)
+
+
+def to_pdf_bytes_vector(
+    free_text: str,
+    logo_img: Image.Image | None,
+    qr_img: Image.Image | None,
+    site_text: str,
+    font_file,
+) -> bytes:
+    """
+    Landscape-letter vector PDF: border, divider and text drawn natively,
+    only the logo and QR embedded as images. Falls back to the raster PDF
+    when the font can't be embedded (e.g. PIL's bitmap default).
+    """
+    return plan().to_pdf(_inputs(free_text, logo_img, qr_img, site_text, font_file))
+
+
+def write_batch_pdf(out, rows, progress=None) -> int:
+    """
+    Stream one printable PDF with a page per row to `out`, a binary file or
+    response. Rows are dicts of render_poster_cached's free_text, site_text
+    and font_file; the bundled logo and QR are stored once however many
+    pages. Returns the page count.
+    """
+    logo, qr = fcAssetCache.load_image(LOGO_PATH), fcAssetCache.load_image(QR_PATH)
+    return fcPdfBatch.write_plan_pdf(out, plan(), (
+        _inputs(row.get("free_text"), logo, qr, row.get("site_text", site_text), row.get("font_file"))
+        for row in rows), progress=progress)
+
+
+# --------------------
+# Render cache
+# --------------------
+
+RENDER_VERSION = 5  # bump whenever the layout or encoding changes
+
+
+def render_poster_cached(free_text: str, site_text: str, font_file, formats=("png", "pdf"),
+                         poster: Image.Image | None = None, dpi: int = fcCanvas.PAGE_DPI) -> dict:
+    """
+    Encoded poster bytes ({format: bytes}) using the bundled logo and QR.
+    Served from fcRenderCache when the same text/site/font was produced
+    before; render_poster only runs on a miss, and not at all for the
+    vector "pdf". Pass an already-rendered `poster` (at `dpi`) to encode
+    it instead of rendering again.
+    """
+    inputs = _inputs(free_text, fcAssetCache.load_image(LOGO_PATH), fcAssetCache.load_image(QR_PATH),
+                     site_text, font_file)
+    return fcTemplates.render_cached(plan(), inputs, _key(free_text, site_text, font_file), formats,
+                                     poster=poster, dpi=dpi)
+
+
+def _key(free_text, site_text, font_file):
+    try:
+        font_key = fcFonts.upload_source(font_file)
+    except Exception:
+        font_key = None
+    return {
+        "v": RENDER_VERSION,
+        "free_text": " ".join((free_text or "").split()),  # wrapping ignores runs of whitespace
+        "site_text": site_text,
+        "font": font_key,
+    }
+
+
+def cache_key(free_text: str, site_text: str, font_file=None, fmt: str = "png",
+              dpi: int = fcCanvas.PAGE_DPI) -> str:
+    """fcRenderCache key of this poster in `fmt`, without rendering (see fcTemplates.cache_key)."""
+    return fcTemplates.cache_key(plan(), _key(free_text, site_text, font_file), fmt, dpi)
@@ -0,0 +1,91 @@
+# fcCanvas – draw a poster layout at any resolution
+# ------------------------------------------------
+# Every layout in the renderers is written in page units: 1/300 inch, the
+# original 300 DPI pixels (POSTER_WIDTH, BORDER_WIDTH, font sizes, ...).
+# At 300 DPI the renderers draw on the PIL image directly. At any other DPI
+# they draw through ScaledCanvas, which:
+# - answers textbbox / textlength at page scale, so every layout decision
+#   (wrapping, auto-fit, positions) is identical at every resolution
+# - scales coordinates, line widths and font sizes on the way to the image
+# - pastes logo/QR variants re-derived from the original asset at the new
+#   scale (fcAssetCache.scaled_variant)
+# So a 72 DPI draft, the 300 DPI poster and a 600 DPI print share one
+# geometry.
+
+from PIL import Image, ImageDraw
+
+import fcAssetCache
+import fcFonts
+
+PAGE_DPI = 300  # layout units per inch
+
+
+def scale_for(dpi) -> float:
+    return dpi / PAGE_DPI
+
+
+def pixel_size(page_size, dpi):
+    """Image size in pixels for a page of `page_size` units at `dpi`."""
+    s = scale_for(dpi)
+    return max(1, round(page_size[0] * s)), max(1, round(page_size[1] * s))
+
+
+class ScaledCanvas:
+    """Stands in for a PIL image and its ImageDraw; takes page units, draws at `scale`."""
+
+    def __init__(self, img: Image.Image, page_size, scale: float):
+        self.image = img
+        self.size = page_size
+        self.scale = scale
+        self._draw = ImageDraw.Draw(img)
+        self._measure = fcFonts.Measure()
+
+    def _xy(self, xy):
+        return tuple(v * self.scale for v in xy)
+
+    def _font(self, font):
+        return fcFonts.font_variant(font, font.size * self.scale) if font is not None else None
+
+    def _width(self, width):
+        return max(1, round(width * self.scale)) if width else width
+
+    # -- measurement (page scale) --
+
+    def textbbox(self, xy, text, font=None, anchor=None, **kwargs):
+        return self._measure.textbbox(xy, text, font=font, anchor=anchor, **kwargs)
+
+    def textlength(self, text, font=None, **kwargs):
+        return self._measure.textlength(text, font=font, **kwargs)
+
+    # -- drawing --
+
+    def text(self, xy, text, fill=None, font=None, anchor=None, **kwargs):
+        self._draw.text(self._xy(xy), text, fill=fill, font=self._font(font), anchor=anchor, **kwargs)
+
+    def line(self, xy, fill=None, width=0, **kwargs):
+        points = [self._xy(p) for p in xy] if isinstance(xy[0], (tuple, list)) else self._xy(xy)
+        self._draw.line(points, fill=fill, width=self._width(width), **kwargs)
+
+    def rectangle(self, xy, fill=None, outline=None, width=1):
+        box = [self._xy(p) for p in xy] if isinstance(xy[0], (tuple, list)) else self._xy(xy)
+        self._draw.rectangle(box, fill=fill, outline=outline, width=self._width(width))
+
+    def paste(self, im, box=None, mask=None):
+        scaled = fcAssetCache.scaled_variant(im, self.scale)
+        if mask is im:
+            mask = scaled
+        elif mask is not None:
+            mask = mask.resize(scaled.size, Image.Resampling.BILINEAR)
+        x, y = (box or (0, 0))[:2]
+        self.image.paste(scaled, (round(x * self.scale), round(y * self.scale)), mask=mask)
+
+
+def draw_targets(img: Image.Image, page_size, dpi):
+    """
+    (img, draw) for the renderers' draw_* functions: the image and its
+    ImageDraw at PAGE_DPI, otherwise one ScaledCanvas for both.
+    """
+    if dpi == PAGE_DPI:
+        return img, ImageDraw.Draw(img)
+    canvas = ScaledCanvas(img, page_size, scale_for(dpi))
+    return canvas, canvas
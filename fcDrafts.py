@@ -0,0 +1,113 @@
+# fcDrafts – debounced, latest-only draft renders for live preview
+# ----------------------------------------------------------------
+# While a form is being edited, every change asks for a new draft. Drafts
+# are rendered at DRAFT_DPI (a few milliseconds, see fcCanvas) and encoded
+# as a small preview; the full-resolution poster is only rendered when the
+# user asks for downloads.
+#
+# LatestOnly keeps fast typing from queueing work:
+# - a request waits DEBOUNCE_SECONDS on a timer before it reaches the
+#   executor, and is dropped if a newer request arrives in the meantime
+# - a render overtaken by a newer request is discarded, never shown
+# - repeating the last request returns its result without rendering, and
+#   repeating the pending one returns its future without restarting it
+# request() never blocks; callers poll the returned future. No Streamlit
+# dependency; fcUi keeps one LatestOnly per session.
+
+import threading
+import time
+from concurrent.futures import Future
+
+import fcEncoding
+import fcTrace
+
+DRAFT_DPI = 72
+DEBOUNCE_SECONDS = 0.15
+
+
+def render_draft(render_poster, args, dpi=DRAFT_DPI) -> dict:
+    """Draft of `render_poster(*args, dpi=dpi)` encoded for display, with its cost."""
+    started = time.perf_counter()
+    with fcTrace.collect() as trace:
+        img = render_poster(*args, dpi=dpi)
+        rendered = time.perf_counter()
+        preview = fcEncoding.encode_preview(img)
+    return {
+        "preview": preview,
+        "format": fcEncoding.PREVIEW_FORMAT,
+        "bytes": len(preview),
+        "dpi": dpi,
+        "render_ms": (rendered - started) * 1000,
+        "ms": (time.perf_counter() - started) * 1000,
+        "trace": trace,
+    }
+
+
+class LatestOnly:
+    """Runs `render(args)` on `executor` for the most recent request only."""
+
+    def __init__(self, render, executor, debounce=DEBOUNCE_SECONDS):
+        self._render = render
+        self._executor = executor
+        self._debounce = debounce
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._pending = None  # (args, future) of the newest request
+        self._timer = None    # its debounce timer
+        self._last = None     # (args, result) of the newest finished render
+
+    @property
+    def last(self):
+        """Result of the newest finished render, or None."""
+        with self._lock:
+            return self._last[1] if self._last else None
+
+    def request(self, args) -> Future:
+        """
+        Ask for a render of `args`, superseding any earlier request. Returns
+        at once; the future resolves to the result, or to None if a newer
+        request overtook this one.
+        """
+        with self._lock:
+            if self._last is not None and self._last[0] == args:
+                done = Future()
+                done.set_result(self._last[1])
+                return done
+            if self._pending is not None and self._pending[0] == args:
+                return self._pending[1]  # already on its way (or failed): don't restart it
+            self._generation += 1
+            if self._timer is not None:
+                self._timer.cancel()  # still debouncing: never reaches the executor
+            if self._pending is not None and not self._pending[1].done():
+                self._pending[1].set_result(None)
+            future = Future()
+            self._pending = (args, future)
+            self._timer = threading.Timer(self._debounce, self._start, (self._generation, args, future))
+            self._timer.daemon = True
+            self._timer.start()
+            return future
+
+    def _current(self, generation):
+        with self._lock:
+            return generation == self._generation
+
+    def _start(self, generation, args, future):
+        if self._current(generation):
+            self._executor.submit(self._run, generation, args, future)
+
+    def _run(self, generation, args, future):
+        # A superseded future was already resolved to None by request()
+        if not self._current(generation):
+            return
+        try:
+            result = self._render(args)
+        except Exception as e:
+            with self._lock:
+                if generation == self._generation:
+                    future.set_exception(e)
+            return
+        with self._lock:
+            if generation != self._generation:
+                return  # superseded while rendering; stale
+            self._last = (args, result)
+            future.set_result(result)
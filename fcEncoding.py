@@ -0,0 +1,102 @@
+# fcEncoding – named PNG encoding profiles shared by all generators
+# ----------------------------------------------------------------
+# - fast:      low zlib level; quickest to produce (social media, previews)
+# - balanced:  zlib level 6 (Pillow's default); the app's download default
+# - smallest:  optimize=True, plus 256-colour palette quantization when the
+#              poster has few enough colours that it is visually lossless
+#              (Today / Blank Space); photo posters (Event) stay RGB
+#
+# Formats are exposed as "png" (default profile), "png-fast",
+# "png-balanced" and "png-smallest"; see benchmarks/encoding_bench.py for
+# measured encode time and size per generator. PDFs come as "pdf" (vector,
+# see fcVectorPdf) and "pdf-raster" (the flattened bitmap, also the
+# fallback when a poster can't be drawn as vectors).
+#
+# Previews are separate: encode_preview downsizes to PREVIEW_MAX_WIDTH and
+# saves a lossy WebP (JPEG where Pillow lacks WebP) for the browser only.
+
+import io
+
+from PIL import Image, ImageChops, features
+
+import fcTrace
+
+PNG_PROFILES = {
+    "fast": {"compress_level": 1},
+    "balanced": {"compress_level": 6},
+    "smallest": {"optimize": True, "quantize": True},
+}
+DEFAULT_PNG_PROFILE = "balanced"
+PDF_FORMATS = ("pdf", "pdf-raster")
+
+# On-screen previews: about a phone screen's width in device pixels
+PREVIEW_MAX_WIDTH = 1080
+PREVIEW_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+PREVIEW_OPTIONS = {"WEBP": {"quality": 80, "method": 2}, "JPEG": {"quality": 85}}
+
+# Palette quantization is only tried for flat-colour artwork and only kept
+# when it is visually lossless.
+QUANTIZE_MAX_SOURCE_COLOURS = 4096
+QUANTIZE_MAX_MEAN_ERROR = 0.5    # mean abs difference per pixel (0-255, grayscale)
+QUANTIZE_MAX_PEAK_ERROR = 24
+
+
+def _quantized(img: Image.Image):
+    """256-colour palette version of `img`, or None if it would be visibly lossy."""
+    if img.mode not in ("RGB", "RGBA"):
+        return None
+    colours = img.getcolors(QUANTIZE_MAX_SOURCE_COLOURS)
+    if colours is None:
+        return None  # photographic content
+    rgb = img.convert("RGB")
+    if len(colours) <= 256:
+        return rgb.quantize(colors=len(colours), method=Image.Quantize.MAXCOVERAGE)
+    pal = rgb.quantize(colors=256, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    hist = ImageChops.difference(pal.convert("RGB"), rgb).convert("L").histogram()
+    total = sum(hist)
+    mean = sum(i * n for i, n in enumerate(hist)) / total
+    peak = max(i for i, n in enumerate(hist) if n)
+    if mean > QUANTIZE_MAX_MEAN_ERROR or peak > QUANTIZE_MAX_PEAK_ERROR:
+        return None
+    return pal
+
+
+def encode_png(img: Image.Image, profile: str = DEFAULT_PNG_PROFILE) -> bytes:
+    """Encode `img` as PNG with a named profile from PNG_PROFILES."""
+    options = dict(PNG_PROFILES[profile])
+    with fcTrace.span("encode.png", profile=profile):
+        if options.pop("quantize", False):
+            img = _quantized(img) or img
+        buf = io.BytesIO()
+        img.save(buf, format="PNG", **options)
+        return buf.getvalue()
+
+
+def png_encoders():
+    """{format name: encoder} for every profile, plus plain "png" for the default."""
+    encoders = {"png": lambda img: encode_png(img, DEFAULT_PNG_PROFILE)}
+    for name in PNG_PROFILES:
+        encoders[f"png-{name}"] = lambda img, name=name: encode_png(img, name)
+    return encoders
+
+
+@fcTrace.timed("encode.preview")
+def encode_preview(img: Image.Image, max_width: int = PREVIEW_MAX_WIDTH,
+                   fmt: str = PREVIEW_FORMAT) -> bytes:
+    """Downscaled, lossy copy of `img` for display; never used for downloads."""
+    if img.width > max_width:
+        size = (max_width, max(1, round(img.height * max_width / img.width)))
+        img = img.resize(size, Image.Resampling.BICUBIC, reducing_gap=2.0)
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **PREVIEW_OPTIONS.get(fmt, {}))
+    return buf.getvalue()
+
+
+def mime_type(fmt: str) -> str:
+    return "application/pdf" if file_extension(fmt) == "pdf" else "image/png"
+
+
+def file_extension(fmt: str) -> str:
+    return fmt.split("-", 1)[0]
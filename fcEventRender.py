@@ -0,0 +1,100 @@
+# fcEventRender – headless Event Details poster renderer
+# ------------------------------------------------------
+# No Streamlit dependency: imported by the fcEventPosterGenerator page,
+# the fcassets batch CLI and anything else that needs posters in bulk.
+# The layout lives in templates/event.json (see fcTemplates): background,
+# logo, site and QR are the cached static layer; the auto-fitted city and
+# everything positioned below it are drawn per request.
+
+#%% Import Packages
+from zoneinfo import ZoneInfo
+
+import fcCanvas
+import fcPdfBatch
+import fcTemplates
+
+#%% Key inputs
+
+TEMPLATE = "event"
+LOGO_PATH = "Forever Canadian No Background.png"
+QR_PATH = "qrcode.png"
+APP_TZ = ZoneInfo("America/Edmonton")  # <- change if needed
+
+POSTER_WIDTH, POSTER_HEIGHT = 2550, 3300  # 8.5x11 in, in page units (1/300 in)
+PAGE_SIZE = (POSTER_WIDTH, POSTER_HEIGHT)
+
+#%% Function definition
+
+def plan():
+    return fcTemplates.load_plan(TEMPLATE)
+
+def _inputs(city, address_line1, address_line2, date_str, time_str,
+            questionText, addlInfo1, addlInfo2):
+    return {"city": city, "address_line1": address_line1, "address_line2": address_line2,
+            "date_str": date_str, "time_str": time_str, "questionText": bool(questionText),
+            "addlInfo1": addlInfo1, "addlInfo2": addlInfo2}
+
+def render_poster(city, address_line1, address_line2, date_str, time_str,
+                  questionText, addlInfo1, addlInfo2, dpi=fcCanvas.PAGE_DPI):
+    return plan().render(_inputs(city, address_line1, address_line2, date_str, time_str,
+                                 questionText, addlInfo1, addlInfo2), dpi=dpi)
+
+def to_pdf_bytes_vector(city, address_line1, address_line2, date_str, time_str,
+                        questionText, addlInfo1, addlInfo2):
+    """
+    Letter-size vector PDF: text drawn natively; the background photo (as
+    JPEG, at its own resolution), logo and QR are the only images. Falls
+    back to the raster PDF if the fonts can't be embedded.
+    """
+    return plan().to_pdf(_inputs(city, address_line1, address_line2, date_str, time_str,
+                                 questionText, addlInfo1, addlInfo2))
+
+def write_batch_pdf(out, events, progress=None):
+    """
+    Stream one printable PDF with a page per event to `out`, a binary file
+    or response. `events` yields dicts of render_poster's arguments; the
+    background, logo, QR and fonts are stored once however many pages.
+    Returns the page count.
+    """
+    return fcPdfBatch.write_plan_pdf(out, plan(), (_inputs(**event) for event in events),
+                                      progress=progress)
+
+def format_event_date(date):
+    """Date line as printed on the poster, e.g. 'Friday, October 17, 2026'."""
+    return date.strftime("%A, %B %d, %Y") if date else ""
+
+def format_event_time(time_start, time_end):
+    """Time line as printed on the poster, e.g. '1:00 PM – 3:00 PM'."""
+    if not (time_start and time_end):
+        return ""
+    return f"{time_start.strftime('%I:%M %p').lstrip('0')} – {time_end.strftime('%I:%M %p').lstrip('0')}"
+
+#%% Render cache
+
+RENDER_VERSION = 5  # bump whenever the layout or encoding changes
+
+def render_poster_cached(city, address_line1, address_line2, date_str, time_str,
+                         questionText, addlInfo1, addlInfo2, formats=("png", "pdf"),
+                         poster=None, dpi=fcCanvas.PAGE_DPI):
+    """
+    Encoded poster bytes ({format: bytes}). Served from fcRenderCache when
+    the same (normalized) event was produced before; render_poster only
+    runs on a miss, and not at all for the vector "pdf". Pass an
+    already-rendered `poster` (at `dpi`) to encode it instead of rendering
+    again.
+    """
+    inputs = _inputs(city, address_line1, address_line2, date_str, time_str,
+                     questionText, addlInfo1, addlInfo2)
+    return fcTemplates.render_cached(plan(), inputs, _key(inputs), formats, poster=poster, dpi=dpi)
+
+
+def _key(inputs):
+    return {"v": RENDER_VERSION, **inputs, "city": inputs["city"].upper()}  # the template upper-cases it anyway
+
+
+def cache_key(city, address_line1, address_line2, date_str, time_str, questionText, addlInfo1, addlInfo2,
+              fmt="png", dpi=fcCanvas.PAGE_DPI) -> str:
+    """fcRenderCache key of this event's poster in `fmt`, without rendering (see fcTemplates.cache_key)."""
+    inputs = _inputs(city, address_line1, address_line2, date_str, time_str,
+                     questionText, addlInfo1, addlInfo2)
+    return fcTemplates.cache_key(plan(), _key(inputs), fmt, dpi)
@@ -0,0 +1,267 @@
+# fcFonts – shared font registry for all poster generators
+# --------------------------------------------------------
+# - Fonts are keyed by (font source, size) and kept in a bounded LRU
+# - A source is a font path, an uploaded-font key, or a tuple of candidates
+#   tried in order; the first one FreeType can open is resolved once
+# - Uploaded font bytes are hashed and kept in memory, so callers never
+#   re-read the upload or re-parse the same file at the same size; they sit
+#   in an LRU bounded by FC_FONT_UPLOAD_MB and take their fonts with them
+#   when evicted
+# - font_variant maps a cached font to another (possibly fractional) size,
+#   for drawing a layout at a different resolution
+# - Measure answers textlength / textbbox from per-font tables: glyph
+#   advances and kerning pairs (FreeType is asked once per character and
+#   pair, then widths are sums) and ink boxes of recently measured strings.
+#   Results equal PIL's exactly; FreeType still does all the drawing.
+#   Bundled fonts always use basic layout, so this holds on Pillow builds
+#   with Raqm too; uploaded fonts keep Raqm shaping there, and their widths
+#   go straight to FreeType.
+
+import hashlib
+import io
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageFont
+
+import fcTrace
+
+FONT_CACHE_SIZE = 256  # (font, size) entries kept before LRU eviction
+BBOX_CACHE_SIZE = 2048  # ink boxes kept per font
+UPLOAD_BUDGET_BYTES = int(os.environ.get("FC_FONT_UPLOAD_MB", "64")) * 1024 * 1024
+UPLOAD_PREFIX = "upload:"
+
+_lock = threading.RLock()
+_fonts: OrderedDict = OrderedDict()   # (resolved source, size) -> FreeTypeFont
+_resolved: dict = {}                  # candidates tuple -> resolved source (or None)
+_uploads: OrderedDict = OrderedDict()  # "upload:<sha1>" -> font bytes, least recently used first
+_upload_bytes = 0
+_upload_keys = weakref.WeakKeyDictionary()  # uploaded file object -> key
+_font_sources = weakref.WeakKeyDictionary()  # FreeTypeFont -> resolved source
+_metrics = weakref.WeakKeyDictionary()  # FreeTypeFont -> _Metrics
+
+
+def register_font_bytes(data: bytes) -> str:
+    """
+    Keep uploaded font bytes in memory and return their content key. The
+    least recently used uploads (and their fonts) are dropped once they
+    exceed UPLOAD_BUDGET_BYTES; the newest one is always kept.
+    """
+    global _upload_bytes
+    key = UPLOAD_PREFIX + hashlib.sha1(data).hexdigest()
+    with _lock:
+        if key in _uploads:
+            _uploads.move_to_end(key)
+            return key
+        _uploads[key] = data
+        _upload_bytes += len(data)
+        while _upload_bytes > UPLOAD_BUDGET_BYTES and len(_uploads) > 1:
+            evicted, evicted_data = _uploads.popitem(last=False)
+            _upload_bytes -= len(evicted_data)
+            _forget_source(evicted)
+    return key
+
+
+def _forget_source(source):
+    # Fonts already handed out keep working; FreeType holds its own copy
+    for key in [k for k in _fonts if k[0] == source]:
+        del _fonts[key]
+    for candidates in [c for c, resolved in _resolved.items() if resolved == source]:
+        del _resolved[candidates]
+
+
+def upload_source(font_file):
+    """
+    Map an uploaded font file (Streamlit UploadedFile or any file-like object)
+    to a registry key. The file is read once; later calls reuse the key.
+    """
+    if font_file is None:
+        return None
+    try:
+        key = _upload_keys[font_file]
+    except (KeyError, TypeError):
+        key = None
+    with _lock:
+        if key in _uploads:
+            _uploads.move_to_end(key)
+            return key
+    if hasattr(font_file, "getvalue"):
+        data = font_file.getvalue()
+    else:
+        if key is not None and hasattr(font_file, "seek"):
+            font_file.seek(0)  # evicted since the last read
+        data = font_file.read()
+    key = register_font_bytes(data)
+    try:
+        _upload_keys[font_file] = key
+    except TypeError:
+        pass  # not weak-referenceable; hashing again next time is still cheap
+    return key
+
+
+@fcTrace.timed("font.load")
+def _open(source, size):
+    if source.startswith(UPLOAD_PREFIX):
+        # Uploads may be any script, so they keep Raqm shaping where Pillow has it
+        return ImageFont.truetype(io.BytesIO(_uploads[source]), size=size)
+    # The bundled fonts are Latin with pair kerning: basic layout draws them
+    # the same with or without Raqm, and lets Measure use its cached tables
+    return ImageFont.truetype(source, size=size, layout_engine=ImageFont.Layout.BASIC)
+
+
+def resolve_source(source):
+    """Return the first candidate in `source` that FreeType can open (cached)."""
+    candidates = (source,) if isinstance(source, str) else tuple(source)
+    with _lock:
+        if candidates in _resolved:
+            return _resolved[candidates]
+    resolved = None
+    for cand in candidates:
+        if not cand:
+            continue
+        try:
+            font = _open(cand, 12)
+        except Exception:
+            continue
+        resolved = cand
+        with _lock:
+            _font_sources[font] = cand
+            _fonts[(cand, 12)] = font
+        break
+    with _lock:
+        _resolved[candidates] = resolved
+    return resolved
+
+
+def get_font(source, size: int):
+    """
+    Return a FreeType font for `source` at `size`, parsing each
+    (font, size) pair at most once while it stays in the LRU.
+    Falls back to PIL's default font when no candidate can be opened.
+    """
+    size = int(size) if float(size).is_integer() else round(float(size), 2)
+    resolved = resolve_source(source)
+    if resolved is None:
+        return ImageFont.load_default()
+    key = (resolved, size)
+    with _lock:
+        font = _fonts.get(key)
+        if font is not None:
+            _fonts.move_to_end(key)
+            return font
+    font = _open(resolved, size)
+    with _lock:
+        _font_sources[font] = resolved
+        _fonts[key] = font
+        _fonts.move_to_end(key)
+        while len(_fonts) > FONT_CACHE_SIZE:
+            _fonts.popitem(last=False)
+    return font
+
+
+def font_variant(font, size):
+    """`font` at another size, through the registry when it came from get_font."""
+    with _lock:
+        source = _font_sources.get(font)
+    if source is None:
+        if not hasattr(font, "font_variant"):
+            return font  # PIL's bitmap default only comes in one size
+        return font.font_variant(size=size)
+    return get_font(source, size)
+
+
+def clear_cache():
+    """Drop all cached fonts and resolutions (uploaded bytes are kept)."""
+    with _lock:
+        _fonts.clear()
+        _resolved.clear()
+
+
+# --------------------
+# Text measurement
+# --------------------
+
+class _Metrics:
+    """Glyph advances, kerning pairs and ink boxes of one font (at its size)."""
+
+    __slots__ = ("advances", "kerning", "boxes")
+
+    def __init__(self):
+        self.advances = {}          # char -> advance
+        self.kerning = {}           # (char, next char) -> adjustment
+        self.boxes = OrderedDict()  # (text, anchor) -> ink box at the origin
+
+
+def _metrics_for(font):
+    try:
+        return _metrics[font]
+    except KeyError:
+        with _lock:
+            return _metrics.setdefault(font, _Metrics())
+
+
+def _additive(font):
+    # Basic layout places glyphs by advance plus pair kerning, so widths add
+    # up; Raqm shaping (ligatures, contextual forms) doesn't.
+    return getattr(font, "layout_engine", None) == ImageFont.Layout.BASIC
+
+
+def text_length(font, text: str) -> float:
+    """
+    font.getlength(text) as a sum of cached glyph advances and kerning
+    pairs. Advances are hinted per size, so each font size has its own table.
+    """
+    if not _additive(font):
+        return font.getlength(text)
+    metrics = _metrics_for(font)
+    advances, kerning = metrics.advances, metrics.kerning
+    total, prev = 0.0, None
+    for ch in text:
+        advance = advances.get(ch)
+        if advance is None:
+            advance = advances[ch] = font.getlength(ch)
+        total += advance
+        if prev is not None:
+            kern = kerning.get((prev, ch))
+            if kern is None:
+                kern = kerning[(prev, ch)] = font.getlength(prev + ch) - advances[prev] - advance
+            total += kern
+        prev = ch
+    return total
+
+
+def text_bbox(font, xy, text: str, anchor=None):
+    """font.getbbox placed at `xy`, with the ink box of each (text, anchor) computed once per font."""
+    metrics = _metrics_for(font)
+    key = (text, anchor)
+    box = metrics.boxes.get(key)
+    if box is None:
+        box = font.getbbox(text, "L", anchor=anchor)
+        with _lock:
+            metrics.boxes[key] = box
+            if len(metrics.boxes) > BBOX_CACHE_SIZE:
+                metrics.boxes.popitem(last=False)
+    return box[0] + xy[0], box[1] + xy[1], box[2] + xy[0], box[3] + xy[1]
+
+
+class Measure:
+    """
+    Stands in for ImageDraw's textlength / textbbox when laying out text,
+    answered by text_length / text_bbox. Anything those don't cover
+    (multiline text, stroke, direction, bitmap fonts) goes to PIL.
+    """
+
+    def __init__(self):
+        self._draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+
+    def textlength(self, text, font=None, **kwargs):
+        if font is None or kwargs or "\n" in text or not hasattr(font, "getbbox"):
+            return self._draw.textlength(text, font=font, **kwargs)
+        return text_length(font, text)
+
+    def textbbox(self, xy, text, font=None, anchor=None, **kwargs):
+        if font is None or kwargs or "\n" in text or not hasattr(font, "layout_engine"):
+            return self._draw.textbbox(xy, text, font=font, anchor=anchor, **kwargs)
+        return text_bbox(font, xy, text, anchor)
@@ -0,0 +1,331 @@
+# fcPdfBatch – one printable PDF for many posters, streamed page by page
+# ----------------------------------------------------------------------
+# PdfBatchWriter writes a multi-page PDF straight to a file (or any object
+# with .write, e.g. an HTTP response) while pages are being drawn:
+# - each page is drawn on a StreamPage, which takes the same calls as
+#   fcVectorPdf.PdfPage, so template plans draw onto it unchanged; its
+#   compressed content stream is written as soon as the page is finished
+# - images are content-addressed: the logo, QR and background photo are
+#   written once as shared XObjects and referenced from every page
+# - TrueType fonts are embedded once per file (whole font, WinAnsi text)
+# What stays in memory is one offset per PDF object and one reference per
+# page (for the xref table and page tree), so memory doesn't grow with
+# the pages' content however long the batch is.
+#
+# Text outside WinAnsi (cp1252) raises fcVectorPdf.VectorUnsupported;
+# write_plan_pdf then embeds that page as a raster image instead.
+
+import hashlib
+import io
+import weakref
+import zlib
+
+from PIL import Image
+
+import fcCanvas
+import fcFonts
+import fcVectorPdf
+
+COMPRESS_LEVEL = 6
+TEXT_ENCODING = "cp1252"  # WinAnsiEncoding
+_WIN_ANSI = [bytes([c]).decode(TEXT_ENCODING, errors="ignore") for c in range(256)]
+
+
+def _pdf_string(data: bytes) -> bytes:
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _num(v) -> str:
+    return f"{v:.3f}".rstrip("0").rstrip(".")
+
+
+class _Font:
+    """One embedded TrueType font: PDF resource name and advance widths per WinAnsi code."""
+
+    def __init__(self, name, widths):
+        self.name = name
+        self.widths = widths  # 256 entries, 1/1000 em
+
+    def encode(self, text):
+        try:
+            return text.encode(TEXT_ENCODING)
+        except UnicodeEncodeError as e:
+            raise fcVectorPdf.VectorUnsupported(f"text outside WinAnsi: {text!r}") from e
+
+    def advance(self, data: bytes, size):
+        return sum(self.widths[c] for c in data) * size / 1000
+
+
+class PdfBatchWriter:
+    """Multi-page PDF written to `out` page by page; use as a context manager or call close()."""
+
+    def __init__(self, out, dpi=fcCanvas.PAGE_DPI):
+        self._out = out
+        self.dpi = dpi
+        self.pages = 0
+        self._pos = 0
+        self._offsets = [0]  # index = object number
+        self._page_refs = []
+        self._fonts = {}  # font key -> _Font
+        self._images = {}  # content hash -> resource name
+        self._image_ids = {}  # id(image) -> (weakref, name, options); skips re-hashing shared images
+        self._catalog = self._reserve()
+        self._pages_ref = self._reserve()
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- low-level object output --
+
+    def _reserve(self) -> int:
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _write(self, data: bytes):
+        self._out.write(data)
+        self._pos += len(data)
+
+    def _object(self, body: str, stream: bytes = None, num: int = None) -> int:
+        num = num or self._reserve()
+        self._offsets[num] = self._pos
+        if stream is None:
+            self._write(f"{num} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+        else:
+            self._write(f"{num} 0 obj\n{body[:-2]} /Length {len(stream)} >>\nstream\n".encode("latin-1"))
+            self._write(stream)
+            self._write(b"\nendstream\nendobj\n")
+        return num
+
+    # -- shared resources --
+
+    def font(self, font) -> _Font:
+        """Embedded font for a PIL FreeTypeFont, written to the file on first use."""
+        key, source = fcVectorPdf.font_source(font)
+        embedded = self._fonts.get(key)
+        if embedded is not None:
+            return embedded
+        from reportlab.pdfbase.ttfonts import TTFontFile
+
+        try:
+            ttf = TTFontFile(source)
+        except Exception as e:  # e.g. CFF-flavoured OpenType
+            raise fcVectorPdf.VectorUnsupported(f"cannot embed font {key}: {e}") from e
+        if hasattr(source, "getvalue"):
+            data = source.getvalue()
+        else:
+            with open(source, "rb") as f:
+                data = f.read()
+        widths = [ttf.charWidths.get(ord(ch), ttf.defaultWidth) if ch else 0 for ch in _WIN_ANSI]
+        base = ttf.name.decode("latin-1").replace(" ", "")
+        font_file = self._object(
+            f"<< /Length1 {len(data)} /Filter /FlateDecode >>", zlib.compress(data, COMPRESS_LEVEL))
+        descriptor = self._object(
+            f"<< /Type /FontDescriptor /FontName /{base} /Flags {(ttf.flags & ~4) | 32}"
+            f" /FontBBox [{' '.join(_num(v) for v in ttf.bbox)}] /ItalicAngle {_num(ttf.italicAngle)}"
+            f" /Ascent {_num(ttf.ascent)} /Descent {_num(ttf.descent)} /CapHeight {_num(ttf.capHeight)}"
+            f" /StemV {_num(ttf.stemV)} /FontFile2 {font_file} 0 R >>")
+        num = self._object(
+            f"<< /Type /Font /Subtype /TrueType /BaseFont /{base} /FirstChar 0 /LastChar 255"
+            f" /Widths [{' '.join(_num(w) for w in widths)}] /FontDescriptor {descriptor} 0 R"
+            f" /Encoding /WinAnsiEncoding >>")
+        embedded = self._fonts[key] = _Font(f"F{num}", widths)
+        return embedded
+
+    def image(self, im: Image.Image, mask=None, jpeg_quality=None) -> str:
+        """XObject name for `im`, written once per distinct image content."""
+        shared = mask is None or mask is im  # only the image itself decides the content
+        options = (mask is not None, jpeg_quality)
+        if shared:
+            hit = self._image_ids.get(id(im))
+            if hit is not None and hit[0]() is im and hit[2] == options:
+                return hit[1]
+        source = im
+        if mask is not None and mask is not im:
+            alpha = mask.getchannel("A") if mask.mode in ("RGBA", "LA") else mask.convert("L")
+            im = im.convert("RGB")
+            im.putalpha(alpha)
+        has_alpha = mask is not None and im.mode in ("RGBA", "LA")
+        rgb = im.convert("RGB") if im.mode != "RGB" else im
+        digest = hashlib.sha1(rgb.tobytes())
+        digest.update(repr((im.size, has_alpha, jpeg_quality)).encode())
+        if has_alpha:
+            digest.update(im.getchannel("A").tobytes())
+        key = digest.hexdigest()
+        name = self._images.get(key)
+        if name is None:
+            name = self._write_image(rgb, im.getchannel("A") if has_alpha else None, jpeg_quality)
+            self._images[key] = name
+        if shared:
+            self._remember(source, name, options)
+        return name
+
+    def _remember(self, im, name, options):
+        key = id(im)
+
+        def forget(ref):
+            if self._image_ids.get(key, (None,))[0] is ref:
+                del self._image_ids[key]
+
+        self._image_ids[key] = (weakref.ref(im, forget), name, options)
+
+    def _write_image(self, rgb, alpha, jpeg_quality) -> str:
+        w, h = rgb.size
+        smask = ""
+        if alpha is not None:
+            num = self._object(
+                f"<< /Type /XObject /Subtype /Image /Width {w} /Height {h} /ColorSpace /DeviceGray"
+                f" /BitsPerComponent 8 /Filter /FlateDecode >>", zlib.compress(alpha.tobytes(), COMPRESS_LEVEL))
+            smask = f" /SMask {num} 0 R"
+        if jpeg_quality and alpha is None:
+            buf = io.BytesIO()
+            rgb.save(buf, format="JPEG", quality=jpeg_quality)
+            data, flt = buf.getvalue(), "/DCTDecode"
+        else:
+            data, flt = zlib.compress(rgb.tobytes(), COMPRESS_LEVEL), "/FlateDecode"
+        num = self._object(
+            f"<< /Type /XObject /Subtype /Image /Width {w} /Height {h} /ColorSpace /DeviceRGB"
+            f" /BitsPerComponent 8 /Filter {flt}{smask} >>", data)
+        return f"Im{num}"
+
+    # -- pages --
+
+    def new_page(self, size) -> "StreamPage":
+        """A blank page of `size` page units; pass it to add_page() when drawn."""
+        return StreamPage(self, size, self.dpi)
+
+    def add_page(self, page: "StreamPage"):
+        """Write a finished page; only its object number is kept."""
+        content = self._object("<< /Filter /FlateDecode >>",
+                               zlib.compress("\n".join(page.ops).encode("latin-1"), COMPRESS_LEVEL))
+        fonts = " ".join(f"/{n} {n[1:]} 0 R" for n in sorted(page.fonts))
+        images = " ".join(f"/{n} {n[2:]} 0 R" for n in sorted(page.images))
+        w, h = page.size[0] * page.scale, page.size[1] * page.scale
+        num = self._object(
+            f"<< /Type /Page /Parent {self._pages_ref} 0 R /MediaBox [0 0 {_num(w)} {_num(h)}]"
+            f" /Resources << /Font << {fonts} >> /XObject << {images} >> >> /Contents {content} 0 R >>")
+        self._page_refs.append(num)
+        self.pages += 1
+
+    def close(self):
+        """Write the page tree, catalog and cross-reference table."""
+        if self._out is None:
+            return
+        kids = " ".join(f"{n} 0 R" for n in self._page_refs)
+        self._object(f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_refs)} >>", num=self._pages_ref)
+        self._object(f"<< /Type /Catalog /Pages {self._pages_ref} 0 R >>", num=self._catalog)
+        xref = self._pos
+        lines = [f"xref\n0 {len(self._offsets)}\n", "0000000000 65535 f \n"]
+        lines += [f"{off:010d} 00000 n \n" for off in self._offsets[1:]]
+        lines.append(f"trailer\n<< /Size {len(self._offsets)} /Root {self._catalog} 0 R >>\n"
+                     f"startxref\n{xref}\n%%EOF\n")
+        self._write("".join(lines).encode("latin-1"))
+        self._out = None
+
+
+class StreamPage:
+    """One page of a PdfBatchWriter; accepts the ImageDraw/Image calls the renderers make."""
+
+    def __init__(self, writer: PdfBatchWriter, size, dpi=fcCanvas.PAGE_DPI):
+        self._writer = writer
+        self.size = self.width, self.height = size
+        self.scale = 72.0 / dpi
+        self.ops = []
+        self.fonts = set()
+        self.images = set()
+        self._measure = fcFonts.Measure()
+
+    def _x(self, x):
+        return _num(x * self.scale)
+
+    def _y(self, y):
+        return _num((self.height - y) * self.scale)
+
+    @staticmethod
+    def _colour(fill, op):
+        return " ".join(_num(c) for c in fcVectorPdf.pdf_rgb(fill)) + f" {op}"
+
+    # -- measurement (PIL metrics, identical to the raster path) --
+
+    def textbbox(self, xy, text, font=None, anchor=None, **kwargs):
+        return self._measure.textbbox(xy, text, font=font, anchor=anchor, **kwargs)
+
+    def textlength(self, text, font=None, **kwargs):
+        return self._measure.textlength(text, font=font, **kwargs)
+
+    # -- drawing --
+
+    def text(self, xy, text, fill=None, font=None, anchor=None, **kwargs):
+        if not text:
+            return
+        if font is None or "\n" in text:
+            raise fcVectorPdf.VectorUnsupported("only single-line TrueType text is supported")
+        embedded = self._writer.font(font)
+        data = embedded.encode(text)
+        h_anchor, v_anchor = (anchor or "la")
+        ascent, descent = font.getmetrics()
+        x, y = xy
+        baseline = {"a": y + ascent, "s": y, "d": y - descent}.get(v_anchor)
+        if baseline is None or h_anchor not in "lmr":
+            raise fcVectorPdf.VectorUnsupported(f"unsupported text anchor {anchor!r}")
+        width = embedded.advance(data, font.size)
+        x -= {"l": 0, "m": width / 2, "r": width}[h_anchor]
+        self.fonts.add(embedded.name)
+        self.ops.append(f"BT /{embedded.name} {_num(font.size * self.scale)} Tf {self._colour(fill, 'rg')}"
+                        f" {self._x(x)} {self._y(baseline)} Td {_pdf_string(data).decode('latin-1')} Tj ET")
+
+    def line(self, xy, fill=None, width=0, **kwargs):
+        points = [tuple(p) for p in xy] if isinstance(xy[0], (tuple, list)) else list(zip(xy[::2], xy[1::2]))
+        path = " ".join(f"{self._x(px)} {self._y(py)} {'m' if i == 0 else 'l'}" for i, (px, py) in enumerate(points))
+        self.ops.append(f"q {self._colour(fill, 'RG')} {_num(max(width, 1) * self.scale)} w 0 J {path} S Q")
+
+    def rectangle(self, xy, fill=None, outline=None, width=1):
+        (x0, y0), (x1, y1) = xy if isinstance(xy[0], (tuple, list)) else (xy[:2], xy[2:])
+        # PIL boxes are inclusive and outlines grow inwards from the box edge
+        x1, y1 = x1 + 1, y1 + 1
+        s = self.scale
+        if fill is not None:
+            self.ops.append(f"q {self._colour(fill, 'rg')} {self._x(x0)} {self._y(y1)}"
+                            f" {_num((x1 - x0) * s)} {_num((y1 - y0) * s)} re f Q")
+        if outline is not None and width > 0:
+            half = width / 2
+            self.ops.append(f"q {self._colour(outline, 'RG')} {_num(width * s)} w 0 j"
+                            f" {self._x(x0 + half)} {self._y(y1 - half)}"
+                            f" {_num((x1 - x0 - width) * s)} {_num((y1 - y0 - width) * s)} re S Q")
+
+    def paste(self, im, box=None, mask=None):
+        """Place `im` at its pixel size with its top-left corner at `box`."""
+        x, y = (box or (0, 0))[:2]
+        self.image(im, (x, y, x + im.width, y + im.height), mask=mask)
+
+    def image(self, im, box, mask=None, jpeg_quality=None):
+        """Place `im` scaled into `box` (x0, y0, x1, y1); each distinct image is stored once per file."""
+        name = self._writer.image(im, mask=mask, jpeg_quality=jpeg_quality)
+        self.images.add(name)
+        x0, y0, x1, y1 = box
+        self.ops.append(f"q {_num((x1 - x0) * self.scale)} 0 0 {_num((y1 - y0) * self.scale)}"
+                        f" {self._x(x0)} {self._y(y1)} cm /{name} Do Q")
+
+
+def write_plan_pdf(out, plan, rows, dpi=fcCanvas.PAGE_DPI, progress=None) -> int:
+    """
+    Stream one page per inputs dict in `rows` of a template plan (see
+    fcTemplates) to `out`. Pages that can't be drawn as vectors are embedded
+    as a raster at `dpi`. `progress(pages_done)` is called after each page.
+    Returns the page count.
+    """
+    with PdfBatchWriter(out) as pdf:
+        for inputs in rows:
+            page = pdf.new_page(plan.page_size)
+            try:
+                plan.draw_vector(page, inputs)
+            except fcVectorPdf.VectorUnsupported:
+                page = pdf.new_page(plan.page_size)
+                page.image(plan.render(inputs, dpi=dpi), (0, 0, *plan.page_size))
+            pdf.add_page(page)
+            if progress is not None:
+                progress(pdf.pages)
+        return pdf.pages
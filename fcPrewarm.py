@@ -0,0 +1,179 @@
+# fcPrewarm – render predictable posters before anyone asks for them
+# ------------------------------------------------------------------
+# The Today's Date poster is fixed to the current Edmonton date, so every
+# visitor on a given day gets the same poster – and right after midnight the
+# first ones would all wait for it at once. The pre-warmer renders the next
+# FC_PREWARM_DAYS days' Today posters, plus any upcoming events listed in
+# FC_PREWARM_EVENTS (a CSV/JSON file of fcassets.py event rows), into
+# fcRenderCache: preview, PNG and PDF from one render. fcRenderService then
+# answers those posters straight from the cache, with no queueing or
+# rendering.
+#
+# In the app it runs as a daemon thread beside the shared render service
+# and only submits work while the queue is empty, one poster at a time, so
+# it never holds anyone up. It can also run once in-process, e.g. from cron:
+#
+#   python fcPrewarm.py --days 7 --events events.csv
+
+import argparse
+import datetime
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+import fcRenderCache
+import fcRenderService
+import fcassets
+
+PREWARM_DAYS = int(os.environ.get("FC_PREWARM_DAYS", "2"))  # today and tomorrow; 0 turns it off
+PREWARM_EVENTS = os.environ.get("FC_PREWARM_EVENTS", "")
+INTERVAL = 600.0       # seconds between checks for posters that are missing
+STARTUP_DELAY = 10.0   # let the app settle before the first pass
+IDLE_POLL = 1.0        # seconds between checks for an idle render pool
+
+log = logging.getLogger("fc.prewarm")
+
+
+#%% What to warm
+
+def _module(generator):
+    return importlib.import_module(fcassets.GENERATORS[generator])
+
+
+def local_today():
+    """The date the Today page shows right now."""
+    return datetime.datetime.now(_module("today").APP_TZ).date()
+
+
+def today_jobs(days, today=None):
+    """[("today", render_poster_cached args)] for `days` days from `today`."""
+    module = _module("today")
+    today = today or local_today()
+    return [("today", module.format_dates(today + datetime.timedelta(days=n))) for n in range(days)]
+
+
+def event_jobs(path, today=None):
+    """Event rows from `path` whose date hasn't passed, as ("event", args) jobs."""
+    if not path:
+        return []
+    module = _module("event")
+    today = today or local_today()
+    try:
+        rows = fcassets.load_rows(path)
+    except (OSError, ValueError) as e:
+        log.warning("prewarm: can't read %s: %s", path, e)
+        return []
+    jobs = []
+    for row in rows:
+        try:
+            if datetime.date.fromisoformat(str(row.get("date", "")).strip()) < today:
+                continue
+        except ValueError:
+            pass  # free-form dates are printed as given; warm them anyway
+        # event_kwargs returns render_poster_cached's arguments in order
+        jobs.append(("event", tuple(fcassets.event_kwargs(row, module).values())))
+    return jobs
+
+
+def planned_jobs(days=PREWARM_DAYS, events=PREWARM_EVENTS, today=None):
+    return today_jobs(days, today) + event_jobs(events, today)
+
+
+def is_warm(generator, args):
+    """Whether every WARM_FORMATS copy of the poster is already cached."""
+    module = _module(generator)
+    return all(fcRenderCache.has(module.cache_key(*args, fmt=fmt))
+               for fmt in fcRenderService.WARM_FORMATS)
+
+
+#%% Background warming
+
+class Prewarmer:
+    """Daemon thread that keeps planned_jobs() warm through a RenderService."""
+
+    def __init__(self, service, days=PREWARM_DAYS, events=PREWARM_EVENTS, interval=INTERVAL):
+        self.service = service
+        self.days, self.events, self.interval = days, events, interval
+        self.warmed = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fc-prewarm", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _idle(self):
+        stats = self.service.stats()
+        return stats["queued"] == 0 and stats["running"] < stats["workers"]
+
+    def _run(self):
+        delay = STARTUP_DELAY
+        while not self._stop.wait(delay):
+            delay = self.interval
+            try:
+                self.warm_pending()
+            except Exception:
+                log.exception("prewarm pass failed")
+
+    def warm_pending(self):
+        """Warm every planned poster that isn't cached, one at a time, only while the pool is idle."""
+        for generator, args in planned_jobs(self.days, self.events):
+            if is_warm(generator, args):
+                continue
+            while not self._idle():
+                if self._stop.wait(IDLE_POLL):
+                    return
+            try:
+                ticket = self.service.submit_poster("prewarm", args, generator, args, kinds=("warm",))["warm"]
+                ticket.result()
+            except (fcRenderService.ServiceBusy, fcRenderService.SessionBusy):
+                return  # a burst arrived; try again next pass
+            except Exception as e:
+                log.warning("prewarm: %s %s failed: %s", generator, args, e)
+                continue
+            self.warmed += 1
+            log.info("prewarm: %s %s ready", generator, args)
+
+
+def start(service, days=PREWARM_DAYS, events=PREWARM_EVENTS):
+    """Start a Prewarmer for `service`; None when FC_PREWARM_DAYS=0 and no events are configured."""
+    if days <= 0 and not events:
+        return None
+    return Prewarmer(service, days, events).start()
+
+
+#%% CLI (one pass, in-process)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="fcPrewarm", description="Pre-render predictable posters into the render cache")
+    parser.add_argument("--days", type=int, default=max(PREWARM_DAYS, 1),
+                        help=f"Today posters to warm, starting today (default: {max(PREWARM_DAYS, 1)})")
+    parser.add_argument("--events", default=PREWARM_EVENTS,
+                        help="CSV/JSON of upcoming event rows (as for fcassets.py) to warm too")
+    opts = parser.parse_args(argv)
+
+    # Asset and font paths in the renderers are relative to the repo
+    os.chdir(fcassets.REPO_DIR)
+    jobs = planned_jobs(opts.days, opts.events)
+    started, warmed = time.perf_counter(), 0
+    print(f"🔥 Pre-warming {len(jobs)} poster(s)…")
+    for generator, args in jobs:
+        if is_warm(generator, args):
+            print(f"   ✅ {generator} {args[0]!r} already cached")
+            continue
+        _module(generator).render_poster_cached(*args, formats=fcRenderService.WARM_FORMATS)
+        warmed += 1
+        print(f"   🖨️ {generator} {args[0]!r} rendered")
+    print(f"🎉 Done: {warmed} rendered, {len(jobs) - warmed} already cached, "
+          f"in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# fcRenderCache – content-addressed cache of finished, encoded posters
+# --------------------------------------------------------------------
+# - Key: sha256 of (generator, normalized inputs, format, asset versions)
+# - Value: the encoded PNG/PDF bytes, exactly as offered for download
+# - Tier 1: in-memory LRU bounded by a byte budget
+# - Tier 2: files under FC_CACHE_DIR/renders that survive restarts
+#   (bounded too; oldest files are pruned first)
+#
+# Identical requests – every canvasser's Today's Date poster, a popular
+# city on the Event poster – are served without drawing or encoding.
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import fcAssetCache
+
+MEMORY_BUDGET_BYTES = int(os.environ.get("FC_RENDER_CACHE_MB", "256")) * 1024 * 1024
+DISK_BUDGET_BYTES = int(os.environ.get("FC_RENDER_DISK_CACHE_MB", "2048")) * 1024 * 1024
+RENDER_CACHE_DIR = os.path.join(fcAssetCache.CACHE_DIR, "renders")
+PRUNE_EVERY = 32  # disk writes between budget checks
+
+_lock = threading.Lock()
+_memory: OrderedDict = OrderedDict()  # key -> bytes
+_memory_bytes = 0
+_writes_since_prune = 0
+
+
+def asset_versions(paths):
+    """Stable fingerprint of the asset files a generator reads."""
+    versions = []
+    for path in paths:
+        try:
+            versions.append([os.path.basename(path), *fcAssetCache.file_stamp(path)])
+        except OSError:
+            versions.append([os.path.basename(path), None, None])
+    return versions
+
+
+def cache_key(generator: str, inputs: dict, fmt: str, assets=()) -> str:
+    """Content address for one encoded poster."""
+    payload = {
+        "generator": generator,
+        "inputs": inputs,
+        "format": fmt,
+        "assets": asset_versions(assets),
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _disk_path(key):
+    return os.path.join(RENDER_CACHE_DIR, key[:2], key)
+
+
+def _remember(key, data):
+    global _memory_bytes
+    if len(data) > MEMORY_BUDGET_BYTES:
+        return
+    with _lock:
+        old = _memory.pop(key, None)
+        if old is not None:
+            _memory_bytes -= len(old)
+        _memory[key] = data
+        _memory_bytes += len(data)
+        while _memory_bytes > MEMORY_BUDGET_BYTES:
+            _, evicted = _memory.popitem(last=False)
+            _memory_bytes -= len(evicted)
+
+
+def get(key):
+    """Cached bytes for `key` (memory first, then disk), or None."""
+    with _lock:
+        data = _memory.get(key)
+        if data is not None:
+            _memory.move_to_end(key)
+            return data
+    try:
+        with open(_disk_path(key), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    _remember(key, data)
+    return data
+
+
+def has(key) -> bool:
+    """Whether `key` is cached in either tier, without reading it."""
+    with _lock:
+        if key in _memory:
+            return True
+    return os.path.exists(_disk_path(key))
+
+
+def put(key, data: bytes):
+    """Store encoded bytes in both tiers (disk is best-effort)."""
+    global _writes_since_prune
+    _remember(key, data)
+    path = _disk_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        return
+    with _lock:
+        _writes_since_prune += 1
+        due = _writes_since_prune >= PRUNE_EVERY
+        if due:
+            _writes_since_prune = 0
+    if due:
+        prune_disk()
+
+
+def prune_disk(budget=None):
+    """Delete the least recently written files until the disk tier fits `budget`."""
+    budget = DISK_BUDGET_BYTES if budget is None else budget
+    entries = []
+    for root, _, files in os.walk(RENDER_CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    total = sum(e[1] for e in entries)
+    for _, size, path in sorted(entries):
+        if total <= budget:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def get_or_render(generator: str, inputs: dict, encoders: dict, render, assets=(), direct=None):
+    """
+    Return {format: bytes} for every format in `encoders` and `direct`.
+    `render()` is called at most once, and only if some raster format is
+    missing; each encoder takes the rendered image and returns bytes.
+    `direct` maps formats produced straight from the inputs (vector PDF)
+    to a zero-argument producer, so they never need the raster.
+    """
+    out, img = {}, None
+    for fmt, encode in encoders.items():
+        key = cache_key(generator, inputs, fmt, assets)
+        data = get(key)
+        if data is None:
+            if img is None:
+                img = render()
+            data = encode(img)
+            put(key, data)
+        out[fmt] = data
+    for fmt, produce in (direct or {}).items():
+        key = cache_key(generator, inputs, fmt, assets)
+        data = get(key)
+        if data is None:
+            data = produce()
+            put(key, data)
+        out[fmt] = data
+    return out
+
+
+def clear_memory():
+    """Drop the in-memory tier (the disk tier is left alone)."""
+    global _memory_bytes
+    with _lock:
+        _memory.clear()
+        _memory_bytes = 0
@@ -0,0 +1,352 @@
+# fcRenderService – shared render worker pool with queueing and backpressure
+# --------------------------------------------------------------------------
+# Full-size renders and encodes are CPU-bound PIL work that holds the GIL,
+# so running them in each session's script thread made every session slower
+# during a burst. One RenderService per server process (fcUi keeps it in
+# st.cache_resource) runs them in worker processes instead:
+# - each poster is one job – its preview and download formats come from a
+#   single render; jobs wait in one FIFO queue and at most `workers` run at
+#   once, so throughput scales with cores
+# - the preview is answered as soon as the poster is drawn; its downloads
+#   are then encoded from the same raster by a follow-up at the front of
+#   the queue
+# - the queue is bounded (ServiceBusy when full) and each session may have
+#   only `per_session` posters in flight (SessionBusy), so one burst cannot
+#   starve everyone else
+# - jobs still queued after `queue_timeout` fail with QueueTimeout right
+#   away (a timer per job), so they stop counting against the queue limit;
+#   Ticket.position() is the place in line for UI feedback
+# - workers send their fcTrace spans back with each result, so the debug
+#   panel and /metrics still see every stage
+# - a worker that dies (OOM, a crash in PIL/FreeType) breaks the process
+#   pool; it is replaced with a fresh one and the jobs caught in the crash
+#   are re-queued once
+# - formats already in fcRenderCache (e.g. pre-rendered by fcPrewarm) are
+#   answered at once; a poster with all of them cached is never queued
+# No Streamlit dependency. Jobs name a generator and its
+# render_poster_cached arguments, so they pickle and any process can run them.
+
+import collections
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import fcRenderCache
+import fcTrace
+
+GENERATORS = {
+    "today": "fcTodayRender",
+    "event": "fcEventRender",
+    "blank_space": "fcBlankSpaceRender",
+}
+DEFAULT_WORKERS = int(os.environ.get("FC_RENDER_WORKERS", os.cpu_count() or 1))
+MAX_QUEUE = 64          # jobs waiting for a worker, across all sessions
+PER_SESSION = 1         # posters in flight per session
+QUEUE_TIMEOUT = 120.0   # seconds a job may wait before it is dropped
+WARM_FORMATS = ("preview", "png", "pdf")  # what a "warm" job (fcPrewarm) stores
+
+
+class ServiceBusy(RuntimeError):
+    """The queue is full; try again shortly."""
+
+
+class SessionBusy(RuntimeError):
+    """This session already has its limit of posters in flight."""
+
+
+class QueueTimeout(TimeoutError):
+    """The job waited longer than the queue timeout and was dropped unstarted."""
+
+
+# --------------------
+# Worker side (runs in the pool's processes)
+# --------------------
+
+def _run_job(kinds, generator, args, dpi=None, poster=None):
+    """
+    (kinds, generator, args, dpi, poster) -> ({kind: bytes}, raster, fcTrace
+    spans), through fcRenderCache. A job with a "preview" and downloads
+    returns only the preview, plus the rendered raster when the downloads
+    need it, so the preview can be shown before they are encoded; they
+    follow as a job that encodes that raster (`poster`) instead of drawing
+    again. ("warm",) stores WARM_FORMATS and returns None for it.
+    """
+    with fcTrace.collect() as trace:
+        module = importlib.import_module(GENERATORS[generator])
+        kwargs = {} if dpi is None else {"dpi": dpi}
+        warm = kinds == ("warm",)
+        if warm:
+            formats = WARM_FORMATS
+        elif "preview" in kinds and len(kinds) > 1:
+            rest = [kind for kind in kinds if kind != "preview"]
+            formats = ("preview", "raster") if any(kind != "pdf" for kind in rest) else ("preview",)
+        else:
+            formats = kinds
+        encoded = module.render_poster_cached(*args, formats=formats, poster=poster, **kwargs)
+        raster = encoded.pop("raster", None)
+        result = {"warm": None} if warm else encoded
+    return result, raster, trace.spans
+
+
+def _init_worker(cwd):
+    os.chdir(cwd)  # assets and fonts are resolved relative to the app directory
+
+
+# --------------------
+# Tickets and the service
+# --------------------
+
+class Ticket:
+    """One format of a poster: a Future for its bytes plus the poster's place in line."""
+
+    def __init__(self, job, kind):
+        self.job, self.kind = job, kind
+        self.future = Future()
+
+    def position(self):
+        """Posters ahead of this one in the queue (0 = next); None once started or finished."""
+        if self.job is None or self.future.done():
+            return None
+        return self.job.service.position(self.job)
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    def done(self):
+        return self.future.done()
+
+
+class _Job:
+    """One queued poster; all of its formats come from a single render."""
+
+    def __init__(self, service, session, group, generator, args, kinds, trace, dpi=None):
+        self.service = service
+        self.session, self.group = session, group
+        self.generator, self.args, self.kinds, self.dpi = generator, args, kinds, dpi
+        self.trace = trace
+        self.tickets = {kind: Ticket(self, kind) for kind in kinds}
+        self.queued_at = time.monotonic()
+        self.started_at = None
+        self.retried = False  # re-queued once after a worker crash
+        self.poster = None    # raster the follow-up job encodes the downloads from
+        self.timer = None     # fails the job if it is still queued after queue_timeout
+
+
+class RenderService:
+    """Bounded FIFO of poster jobs in front of a process pool (see module notes)."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_queue=MAX_QUEUE, per_session=PER_SESSION,
+                 queue_timeout=QUEUE_TIMEOUT):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.per_session = per_session
+        self.queue_timeout = queue_timeout
+        self._processes = workers > 0
+        self._cwd = os.getcwd()
+        self._pool = self._new_pool()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._queue = collections.deque()
+        self._running = 0
+        self._groups = collections.defaultdict(set)  # session -> posters with unfinished jobs
+        self._open = collections.Counter()           # (session, group) -> unfinished jobs
+
+    def _new_pool(self):
+        if self._processes:
+            return ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(self._cwd,))
+        # FC_RENDER_WORKERS=0: run in a thread of this process (debugging)
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="fc-render")
+
+    def _replace_pool(self, broken):
+        """
+        A worker died (OOM, a crash in PIL/FreeType) and took the pool with
+        it: swap in a fresh one, once per broken pool. Call with the lock held.
+        """
+        if self._closed or self._pool is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._new_pool()
+
+    def submit_poster(self, session, group, generator, args, kinds=("preview", "png", "pdf"), trace=None,
+                      dpi=None):
+        """
+        Queue one poster (`group`, e.g. its inputs) and return {kind: Ticket}
+        for every kind in `kinds`; they all come from a single render. A
+        poster this session already has in flight doesn't count against its
+        limit again. `dpi` defaults to the generator's.
+        Raises SessionBusy or ServiceBusy instead of queueing more.
+        """
+        if generator not in GENERATORS:
+            raise ValueError(f"unknown generator {generator!r}")
+        trace = trace or fcTrace.Trace()
+        ready = self._ready(generator, args, kinds, dpi, trace)
+        tickets = {kind: self._done_ticket(kind, data) for kind, data in ready.items()}
+        missing = tuple(kind for kind in kinds if kind not in ready)
+        if missing:  # anything not pre-rendered queues as one job
+            self._expire()  # so the limits below count live work only
+            with self._lock:
+                groups = self._groups[session]
+                if group not in groups and len(groups) >= self.per_session:
+                    raise SessionBusy("your previous poster is still being made")
+                if len(self._queue) >= self.max_queue:
+                    raise ServiceBusy("the server is busy")
+                job = _Job(self, session, group, generator, args, missing, trace, dpi)
+                groups.add(group)
+                self._open[(session, group)] += 1
+                self._queue.append(job)
+                self._start_timer(job)
+            tickets.update(job.tickets)
+            self._dispatch()
+        return {kind: tickets[kind] for kind in kinds}
+
+    def _ready(self, generator, args, kinds, dpi, trace):
+        """{kind: bytes} already in fcRenderCache (e.g. put there by fcPrewarm)."""
+        if "warm" in kinds:
+            return {}
+        module = importlib.import_module(GENERATORS[generator])
+        kwargs = {} if dpi is None else {"dpi": dpi}
+        ready = {}
+        with fcTrace.collect(trace), fcTrace.span("render_cache.lookup"):
+            for kind in kinds:
+                data = fcRenderCache.get(module.cache_key(*args, fmt=kind, **kwargs))
+                if data is not None:
+                    ready[kind] = data
+        return ready
+
+    @staticmethod
+    def _done_ticket(kind, data):
+        ticket = Ticket(None, kind)
+        ticket.future.set_result(data)
+        return ticket
+
+    def position(self, job):
+        with self._lock:
+            if job.started_at is not None:
+                return None
+            try:
+                return self._queue.index(job)
+            except ValueError:
+                return None
+
+    def stats(self):
+        with self._lock:
+            return {"queued": len(self._queue), "running": self._running, "workers": self.workers,
+                    "sessions": sum(1 for groups in self._groups.values() if groups)}
+
+    def _expired(self, job, now):
+        return now - job.queued_at >= self.queue_timeout
+
+    def _expire(self):
+        """Fail queued jobs that have waited queue_timeout, instead of when they reach a worker."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [job for job in self._queue if self._expired(job, now)]
+            for job in expired:
+                self._queue.remove(job)
+        for job in expired:
+            self._settle(job, error=QueueTimeout("waited too long for a free renderer"))
+
+    def _submit(self, job):
+        """Hand `job` to the pool, replacing a broken pool once. Call with the lock held."""
+        pool = self._pool
+        try:
+            future = pool.submit(_run_job, job.kinds, job.generator, job.args, job.dpi, job.poster)
+        except BrokenProcessPool:
+            self._replace_pool(pool)
+            pool = self._pool
+            future = pool.submit(_run_job, job.kinds, job.generator, job.args, job.dpi, job.poster)
+        return future, pool
+
+    def _dispatch(self):
+        dropped = []
+        with self._lock:
+            while self._queue and self._running < self.workers:
+                job = self._queue.popleft()
+                if job.timer is not None:
+                    job.timer.cancel()
+                if self._expired(job, time.monotonic()):
+                    dropped.append((job, QueueTimeout("waited too long for a free renderer")))
+                    continue
+                try:
+                    future, pool = self._submit(job)
+                except RuntimeError as e:  # pool shut down (server exiting) or broken again
+                    dropped.append((job, e))
+                    continue
+                job.started_at = time.monotonic()
+                self._running += 1
+                future.add_done_callback(lambda f, j=job, p=pool: self._finished(j, f, p))
+        for job, error in dropped:
+            self._settle(job, error=error)
+
+    def _finished(self, job, future, pool):
+        with self._lock:
+            self._running -= 1
+        try:
+            results, raster, spans = future.result()
+        except BrokenProcessPool as e:
+            with self._lock:
+                self._replace_pool(pool)
+                retry = not job.retried and not self._closed
+                if retry:  # it may not have been this job that crashed: try once more
+                    job.retried = True
+                    self._requeue(job)
+            if not retry:
+                self._settle(job, error=e)
+        except BaseException as e:
+            self._settle(job, error=e)
+        else:
+            fcTrace.merge(spans, job.trace)
+            rest = tuple(kind for kind in job.kinds if kind not in results)
+            if rest:  # preview first; the downloads follow from the same raster
+                self._resolve(job, results)
+                with self._lock:
+                    job.kinds, job.poster = rest, raster
+                    self._requeue(job)
+            else:
+                self._settle(job, results=results)
+        self._dispatch()
+
+    def _requeue(self, job):
+        """Put a started `job` back at the front of the queue, with a fresh wait. Call with the lock held."""
+        job.started_at, job.queued_at = None, time.monotonic()
+        self._queue.appendleft(job)
+        self._start_timer(job)
+
+    def _start_timer(self, job):
+        job.timer = threading.Timer(self.queue_timeout, self._expire)
+        job.timer.daemon = True
+        job.timer.start()
+
+    @staticmethod
+    def _resolve(job, results):
+        for kind, data in results.items():
+            job.tickets[kind].future.set_result(data)
+
+    def _settle(self, job, results=None, error=None):
+        job.poster = None
+        with self._lock:
+            key = (job.session, job.group)
+            self._open[key] -= 1
+            if self._open[key] <= 0:
+                del self._open[key]
+                self._groups[job.session].discard(job.group)
+                if not self._groups[job.session]:
+                    del self._groups[job.session]
+        for kind, ticket in job.tickets.items():
+            if ticket.done():
+                continue  # the preview, answered ahead of the downloads
+            if error is not None:
+                ticket.future.set_exception(error)
+            else:
+                ticket.future.set_result(results[kind])
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,801 @@
+# fcTemplates – declarative poster templates compiled to cached layout plans
+# --------------------------------------------------------------------------
+# A template (templates/<name>.json) describes one page:
+#   page     size in page units (1/300 in) and a colour or photo background
+#   fonts    named fonts: candidate files, optionally led by an uploaded font
+#   inputs   the values a poster is made from, with defaults
+#   vars     named numbers / expressions shared by the blocks
+#   blocks   drawn in order:
+#     text     one line; literal or "{input}" text, optional fit_width rule
+#     textbox  text wrapped and auto-sized to fill a box
+#     image    bundled asset or input image fitted into a box ("qr": crisp)
+#     stack    images / text stacked and centred in a box as one unit
+#     line, rect   rules, borders and plain boxes
+# Any number may be an expression over W, H, inputs, vars and earlier
+# blocks ("logo.bottom + 100", "int(W * 0.15)"); "when" skips a block.
+#
+# load_plan() compiles a template once per file version: expressions are
+# parsed and checked, fonts resolved, and each block is classified static
+# (nothing it depends on changes per poster) or dynamic. Rendering lays
+# out every block, draws the static ones into a layer cached per (plan,
+# dpi, static inputs) and draws only the dynamic ones per poster – onto a
+# PIL image, an fcCanvas.ScaledCanvas or an fcVectorPdf.PdfPage, so the
+# raster, any-DPI and vector outputs share one layout.
+
+import ast
+import functools
+import hashlib
+import io
+import json
+import os
+import string
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+
+from PIL import Image
+
+import fcAssetCache
+import fcCanvas
+import fcEncoding
+import fcFonts
+import fcRenderCache
+import fcText
+import fcTrace
+import fcVectorPdf
+
+TEMPLATE_DIR = "templates"
+STATIC_LAYER_CACHE_SIZE = 8
+RENDER_VERSION = 1  # bump whenever the engine's drawing or encoding changes
+
+FUNCTIONS = {"int": int, "min": min, "max": max, "round": round, "len": len}
+_ALLOWED_NODES = (
+    ast.Expression, ast.Constant, ast.Name, ast.Load, ast.Attribute, ast.Call,
+    ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.USub, ast.UAdd,
+    ast.Not, ast.And, ast.Or, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.Is, ast.IsNot,
+)
+
+_plans_lock = threading.Lock()
+_plans: dict = {}  # abs path -> (file stamp, Plan)
+_layers_lock = threading.Lock()
+_layers: OrderedDict = OrderedDict()  # (plan key, dpi, static input keys) -> (pinned inputs, Image)
+
+
+class TemplateError(ValueError):
+    """A template that can't be compiled, or inputs it doesn't declare."""
+
+
+# --------------------
+# Expressions and text
+# --------------------
+
+class Expr:
+    """A number, or an expression string compiled once and checked for safety."""
+
+    def __init__(self, source, where):
+        self.source = source
+        self.refs = set()  # (name, attribute or None)
+        self._code = None
+        if not isinstance(source, str):
+            return
+        try:
+            tree = ast.parse(source, mode="eval")
+        except SyntaxError as e:
+            raise TemplateError(f"{where}: {e.msg} in {source!r}") from None
+        attr_bases = set()
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise TemplateError(f"{where}: {type(node).__name__} not allowed in {source!r}")
+            if isinstance(node, ast.Call) and not (
+                    isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS):
+                raise TemplateError(f"{where}: only {', '.join(FUNCTIONS)} can be called in {source!r}")
+            if isinstance(node, ast.Attribute):
+                if not isinstance(node.value, ast.Name) or node.attr.startswith("_"):
+                    raise TemplateError(f"{where}: use block.attribute in {source!r}")
+                attr_bases.add(id(node.value))
+                self.refs.add((node.value.id, node.attr))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and id(node) not in attr_bases and node.id not in FUNCTIONS:
+                self.refs.add((node.id, None))
+        self._code = compile(tree, where, "eval")
+
+    def __call__(self, env):
+        if self._code is None:
+            return self.source
+        return eval(self._code, {"__builtins__": {}, **FUNCTIONS}, env)
+
+
+class TextSource:
+    """Literal text with optional {input} / {var} placeholders."""
+
+    def __init__(self, source, where):
+        self.source = str(source)
+        self.refs = set()
+        for _, field, _, _ in string.Formatter().parse(self.source):
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise TemplateError(f"{where}: placeholder {{{field}}} must be a plain name")
+            self.refs.add((field, None))
+
+    def __call__(self, env):
+        return self.source.format_map(env) if self.refs else self.source
+
+
+def _colour(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _paste(img, im, xy):
+    with fcTrace.span("image.paste"):
+        img.paste(im, xy, mask=im if im.mode in ("RGBA", "LA") else None)
+
+
+# --------------------
+# Blocks
+# --------------------
+
+class _Block:
+    kind = ""
+
+    def __init__(self, spec, plan, where):
+        self.id = spec.get("id")
+        self.where = where
+        self.plan = plan
+        self.when = Expr(spec["when"], f"{where}.when") if "when" in spec else None
+        self.static = True
+        self._static_attrs = set()  # attributes that stay static on a dynamic block
+
+    def expr(self, spec, key, default=None):
+        return Expr(spec.get(key, default), f"{self.where}.{key}")
+
+    def sources(self):
+        """Every Expr / TextSource the block reads."""
+        return [self.when] if self.when else []
+
+    def extra_refs(self):
+        return set()
+
+    def attr_dynamic(self, attr):
+        return not self.static and attr not in self._static_attrs
+
+    def place(self, env, ctx):
+        """Lay the block out. Returns (geometry namespace, paint(img, draw)) or None to skip."""
+        raise NotImplementedError
+
+
+class TextBlock(_Block):
+    kind = "text"
+
+    def __init__(self, spec, plan, where):
+        super().__init__(spec, plan, where)
+        self.text = TextSource(spec.get("text", ""), f"{where}.text")
+        self.font = plan.font_name(spec.get("font"), where)
+        self.size = self.expr(spec, "size", 60)
+        self.x = self.expr(spec, "x", 0)
+        self.y = self.expr(spec, "y", 0)
+        self.anchor = spec.get("anchor", "la")
+        self.fill = _colour(spec.get("fill", "black"))
+        self.upper = spec.get("transform") == "upper"
+        fit = spec.get("fit_width")
+        self.fit_max = Expr(fit["max_width"], f"{where}.fit_width.max_width") if fit else None
+        self.fit_min = fit.get("min_size", 60) if fit else None
+        self.center_in = [Expr(v, f"{where}.center_in") for v in spec["center_in"]] if "center_in" in spec else None
+
+    def sources(self):
+        out = super().sources() + [self.text, self.size, self.x, self.y]
+        if self.fit_max:
+            out.append(self.fit_max)
+        return out + (self.center_in or [])
+
+    def extra_refs(self):
+        return self.plan.font_refs(self.font)
+
+    def classify(self, is_dynamic):
+        if is_dynamic(self.y.refs):
+            return
+        self._static_attrs.add("y")
+        if self.center_in is None and not is_dynamic(self.x.refs):
+            self._static_attrs.add("x")
+
+    def measure(self, env, ctx):
+        text = self.text(env)
+        if self.upper:
+            text = text.upper()
+        if self.fit_max is not None:
+            font = fcText.fit_font_to_width(ctx.measure, text, lambda s: ctx.font(self.font, s),
+                                            self.size(env), self.fit_max(env), min_size=self.fit_min)
+        else:
+            font = ctx.font(self.font, self.size(env))
+        return text, font
+
+    def place(self, env, ctx):
+        text, font = self.measure(env, ctx)
+        y, anchor = self.y(env), self.anchor
+        if self.center_in is not None:
+            x0, x1 = (e(env) for e in self.center_in)
+            x, anchor = x0 + (x1 - x0 - ctx.measure.textlength(text, font=font)) // 2, "la"
+        else:
+            x = self.x(env)
+        bbox = ctx.measure.textbbox((x, y), text, font=font, anchor=anchor)
+        fill = self.fill
+
+        def paint(img, draw):
+            draw.text((x, y), text, font=font, fill=fill, anchor=anchor)
+
+        geom = SimpleNamespace(x=x, y=y, size=font.size, width=bbox[2] - bbox[0],
+                               ink_top=bbox[1], ink_bottom=bbox[3], bottom=bbox[3])
+        return geom, paint
+
+
+class ImageBlock(_Block):
+    kind = "image"
+
+    def __init__(self, spec, plan, where):
+        super().__init__(spec, plan, where)
+        self.asset = spec.get("asset")
+        self.input = spec.get("input")
+        if bool(self.asset) == bool(self.input):
+            raise TemplateError(f"{where}: an image needs exactly one of 'asset' or 'input'")
+        if self.input and self.input not in plan.inputs:
+            raise TemplateError(f"{where}: unknown input {self.input!r}")
+        box = spec.get("box", [0, 0, None, None])
+        self.box = [Expr(v, f"{where}.box") for v in box]
+        self.fit = [Expr(v, f"{where}.fit") for v in spec["fit"]] if "fit" in spec else None
+        self.upscale = spec.get("upscale", True)
+        self.qr = spec.get("qr", False)
+        self.align = spec.get("align", "center")
+        self.valign = spec.get("valign", "top")
+
+    def sources(self):
+        return super().sources() + self.box + (self.fit or [])
+
+    def extra_refs(self):
+        return {(self.input, None)} if self.input else set()
+
+    def fitted(self, env):
+        src = fcAssetCache.load_image(self.asset) if self.asset else env[self.input]
+        if src is None:
+            return None
+        x0, y0, x1, y1 = (e(env) for e in self.box)
+        max_w, max_h = (e(env) for e in self.fit) if self.fit else (x1 - x0, y1 - y0)
+        if self.qr:
+            return fcAssetCache.fit_qr(src, max_w, max_h, upscale=self.upscale)
+        return fcAssetCache.fit_variant(src, max_w, max_h, upscale=self.upscale)
+
+    def place(self, env, ctx):
+        im = self.fitted(env)
+        if im is None:
+            return None
+        x0, y0, x1, y1 = (e(env) for e in self.box)
+        x = {"left": x0, "right": x1 - im.width if x1 is not None else x0}.get(
+            self.align, x0 + (x1 - x0 - im.width) // 2 if x1 is not None else x0)
+        y = {"center": y0 + (y1 - y0 - im.height) // 2 if y1 is not None else y0,
+             "bottom": y1 - im.height if y1 is not None else y0}.get(self.valign, y0)
+
+        def paint(img, draw):
+            _paste(img, im, (x, y))
+
+        geom = SimpleNamespace(x=x, y=y, width=im.width, height=im.height,
+                               right=x + im.width, bottom=y + im.height)
+        return geom, paint
+
+
+class StackBlock(_Block):
+    kind = "stack"
+
+    def __init__(self, spec, plan, where):
+        super().__init__(spec, plan, where)
+        self.box = [Expr(v, f"{where}.box") for v in spec["box"]]
+        self.gap = self.expr(spec, "gap", 0)
+        self.children = []
+        for i, child in enumerate(spec.get("children", [])):
+            cls = {"image": ImageBlock, "text": TextBlock}.get(child.get("type"))
+            if cls is None:
+                raise TemplateError(f"{where}.children[{i}]: stacks hold images and text")
+            self.children.append(cls(child, plan, f"{where}.children[{i}]"))
+
+    def sources(self):
+        out = super().sources() + self.box + [self.gap]
+        for child in self.children:
+            out += child.sources()
+        return out
+
+    def extra_refs(self):
+        return set().union(*(child.extra_refs() for child in self.children))
+
+    def place(self, env, ctx):
+        items = []  # (w, h, draw(x, y)) of the children that have content
+        for child in self.children:
+            if child.when is not None and not child.when(env):
+                continue
+            if isinstance(child, ImageBlock):
+                im = child.fitted(env)
+                if im is not None:
+                    items.append((im.width, im.height, lambda x, y, im=im: ("image", im, (x, y))))
+            else:
+                text, font = child.measure(env, ctx)
+                if text:
+                    bbox = ctx.measure.textbbox((0, 0), text, font=font, anchor="lt")
+                    w = int(round(ctx.measure.textlength(text, font=font)))
+                    items.append((w, bbox[3] - bbox[1],
+                                  lambda x, y, t=text, f=font, c=child.fill: ("text", (t, f, c), (x, y))))
+        if not items:
+            return None
+        x0, y0, x1, y1 = (e(env) for e in self.box)
+        gap = self.gap(env)
+        block_w = max(w for w, _, _ in items)
+        block_h = sum(h for _, h, _ in items) + gap * (len(items) - 1)
+        block_x = int(x0 + ((x1 - x0) - block_w) // 2)
+        block_y = int(y0 + ((y1 - y0) - block_h) // 2)
+        ops, y = [], block_y
+        for w, h, op in items:
+            ops.append(op(int(block_x + (block_w - w) // 2), int(y)))
+            y += h + gap
+
+        def paint(img, draw):
+            for kind, what, xy in ops:
+                if kind == "image":
+                    _paste(img, what, xy)
+                else:
+                    text, font, fill = what
+                    draw.text(xy, text, font=font, fill=fill)
+
+        geom = SimpleNamespace(x=block_x, y=block_y, width=block_w, height=block_h,
+                               right=block_x + block_w, bottom=block_y + block_h)
+        return geom, paint
+
+
+class TextboxBlock(_Block):
+    kind = "textbox"
+
+    def __init__(self, spec, plan, where):
+        super().__init__(spec, plan, where)
+        self.text = TextSource(spec.get("text", ""), f"{where}.text")
+        self.font = plan.font_name(spec.get("font"), where)
+        self.box = [Expr(v, f"{where}.box") for v in spec["box"]]
+        self.max_size = spec.get("max_size", 300)
+        self.min_size = spec.get("min_size", 16)
+        self.line_gap = spec.get("line_gap", 0.15)
+        self.fill = _colour(spec.get("fill", "black"))
+
+    def sources(self):
+        return super().sources() + [self.text] + self.box
+
+    def extra_refs(self):
+        return self.plan.font_refs(self.font)
+
+    def place(self, env, ctx):
+        text = self.text(env)
+        x0, y0, x1, y1 = (e(env) for e in self.box)
+        box_h = max(0, y1 - y0)
+        box_w = max(1, x1 - x0)
+        measure = ctx.measure
+        font, lines, _, gap_px = fcText.fit_text_to_box(
+            measure, text, lambda s: ctx.font(self.font, s), max_width=box_w, max_height=box_h,
+            max_font_size=self.max_size, min_font_size=self.min_size, line_gap=self.line_gap)
+
+        # Centred horizontally and vertically, each line's own ink height
+        heights = []
+        for ln in lines:
+            bbox = measure.textbbox((0, 0), ln, font=font, anchor="lt")
+            heights.append(bbox[3] - bbox[1])
+        total_h = sum(heights) + gap_px * (len(heights) - 1)
+        y = y0 + max(0, (box_h - total_h) // 2)
+        placed = []
+        for ln, h in zip(lines, heights):
+            placed.append((x0 + (box_w - measure.textlength(ln, font=font)) // 2, y, ln))
+            y += h + gap_px
+        fill = self.fill
+
+        def paint(img, draw):
+            for x, y, ln in placed:
+                draw.text((x, y), ln, font=font, fill=fill)
+
+        geom = SimpleNamespace(x=x0, y=y0, size=font.size, lines=len(lines), bottom=y)
+        return geom, paint
+
+
+class LineBlock(_Block):
+    kind = "line"
+
+    def __init__(self, spec, plan, where):
+        super().__init__(spec, plan, where)
+        self.points = [[Expr(v, f"{where}.points") for v in p] for p in spec["points"]]
+        self.width = self.expr(spec, "width", 1)
+        self.fill = _colour(spec.get("fill", "black"))
+
+    def sources(self):
+        return super().sources() + [e for p in self.points for e in p] + [self.width]
+
+    def place(self, env, ctx):
+        points = [tuple(e(env) for e in p) for p in self.points]
+        width, fill = self.width(env), self.fill
+
+        def paint(img, draw):
+            draw.line(points, fill=fill, width=width)
+
+        return SimpleNamespace(x=points[0][0], y=points[0][1], width=width), paint
+
+
+class RectBlock(_Block):
+    kind = "rect"
+
+    def __init__(self, spec, plan, where):
+        super().__init__(spec, plan, where)
+        self.box = [Expr(v, f"{where}.box") for v in spec["box"]]
+        self.width = self.expr(spec, "width", 1)
+        self.fill = _colour(spec.get("fill"))
+        self.outline = _colour(spec.get("outline"))
+
+    def sources(self):
+        return super().sources() + self.box + [self.width]
+
+    def place(self, env, ctx):
+        x0, y0, x1, y1 = (e(env) for e in self.box)
+        width, fill, outline = self.width(env), self.fill, self.outline
+
+        def paint(img, draw):
+            draw.rectangle([(x0, y0), (x1, y1)], fill=fill, outline=outline, width=width)
+
+        return SimpleNamespace(x=x0, y=y0, right=x1, bottom=y1), paint
+
+
+BLOCK_TYPES = {cls.kind: cls for cls in (TextBlock, TextboxBlock, ImageBlock, StackBlock, LineBlock, RectBlock)}
+
+
+# --------------------
+# Plans
+# --------------------
+
+class _Layout:
+    """Per-poster layout state: PIL measurement and the fonts for these inputs."""
+
+    def __init__(self, plan, values):
+        self.measure = fcFonts.Measure()
+        self._sources = {name: plan.font_source(name, values) for name in plan.fonts}
+
+    def font(self, name, size):
+        return fcFonts.get_font(self._sources[name], size)
+
+
+def _input_key(value):
+    """Hashable identity of a static input for the layer cache."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, Image.Image):
+        return ("image", id(value))  # pinned by the cache entry
+    try:
+        return ("font", fcFonts.upload_source(value))
+    except Exception:
+        return ("object", id(value))
+
+
+class Plan:
+    """A compiled template: resolved fonts, checked expressions, static/dynamic blocks."""
+
+    def __init__(self, spec: dict, path: str = "<template>", digest: str = ""):
+        self.name = spec.get("name") or os.path.splitext(os.path.basename(path))[0]
+        self.path = path
+        self.digest = digest
+        self.key = (path, digest)
+        page = spec.get("page", {})
+        self.page_size = (int(page.get("width", 2550)), int(page.get("height", 3300)))
+        background = page.get("background", "white")
+        self.background = background if isinstance(background, dict) else {"colour": _colour(background)}
+        self.inputs = dict(spec.get("inputs", {}))
+        self.static_inputs = tuple(spec.get("static_inputs", ()))
+        for name in self.static_inputs:
+            if name not in self.inputs:
+                raise TemplateError(f"{path}: static input {name!r} is not declared")
+
+        # Fonts: candidates resolved once; an upload (if any) is tried first at render time
+        self.fonts = {}
+        for name, font in spec.get("fonts", {}).items():
+            if isinstance(font, (str, list)):
+                font = {"candidates": font}
+            candidates = (font["candidates"],) if isinstance(font["candidates"], str) else tuple(font["candidates"])
+            resolved = fcFonts.resolve_source(candidates)
+            self.fonts[name] = {"candidates": candidates,
+                                "source": (resolved,) if resolved else candidates,
+                                "upload": font.get("upload")}
+
+        self.vars = {name: Expr(value, f"{path}: vars.{name}") for name, value in spec.get("vars", {}).items()}
+        self.blocks = []
+        for i, block in enumerate(spec.get("blocks", [])):
+            cls = BLOCK_TYPES.get(block.get("type"))
+            where = f"{path}: blocks[{i}]" + (f" ({block['id']})" if block.get("id") else "")
+            if cls is None:
+                raise TemplateError(f"{where}: unknown block type {block.get('type')!r}")
+            self.blocks.append(cls(block, self, where))
+        self.image_inputs = {b.input for b in self._all_blocks() if getattr(b, "input", None)}
+        self._classify()
+
+    # -- compile-time helpers --
+
+    def font_name(self, name, where):
+        if name not in self.fonts:
+            raise TemplateError(f"{where}: unknown font {name!r}")
+        return name
+
+    def font_refs(self, name):
+        upload = self.fonts[name]["upload"]
+        return {(upload, None)} if upload else set()
+
+    def font_source(self, name, values):
+        font = self.fonts[name]
+        if not font["upload"]:
+            return font["source"]
+        try:
+            upload = fcFonts.upload_source(values.get(font["upload"]))
+        except Exception:
+            upload = None
+        return (upload, *font["source"])
+
+    def _classify(self):
+        # Names resolve to inputs, earlier vars and earlier blocks only
+        seen_vars, dynamic_vars, blocks = set(), set(), {}
+
+        def is_dynamic(refs, where):
+            for name, attr in refs:
+                if name in ("W", "H"):
+                    continue
+                if name in self.inputs:
+                    if name not in self.static_inputs:
+                        return True
+                elif name in seen_vars:
+                    if name in dynamic_vars:
+                        return True
+                elif name in blocks:
+                    if blocks[name].attr_dynamic(attr):
+                        return True
+                else:
+                    raise TemplateError(f"{where}: unknown name {name!r}")
+            return False
+
+        for name, expr in self.vars.items():
+            if is_dynamic(expr.refs, f"{self.path}: vars.{name}"):
+                dynamic_vars.add(name)
+            seen_vars.add(name)
+        for block in self.blocks:
+            refs = set(block.extra_refs())
+            for source in block.sources():
+                refs |= source.refs
+            block.static = not is_dynamic(refs, block.where)
+            if not block.static and hasattr(block, "classify"):
+                block.classify(lambda r, w=block.where: is_dynamic(r, w))
+            if block.id:
+                blocks[block.id] = block
+
+    def _all_blocks(self):
+        for block in self.blocks:
+            yield block
+            yield from getattr(block, "children", ())
+
+    @property
+    def asset_files(self):
+        """Files whose contents the output depends on (for render-cache keys)."""
+        files = [self.path]
+        for font in self.fonts.values():
+            files += [c for c in font["candidates"] if c]
+        if "image" in self.background:
+            files.append(self.background["image"])
+        files += [b.asset for b in self._all_blocks() if getattr(b, "asset", None)]
+        return list(dict.fromkeys(files))
+
+    # -- rendering --
+
+    def bind(self, inputs=None, **kwargs):
+        """Declared inputs with defaults filled in; unknown names are an error."""
+        values = dict(self.inputs)
+        for name, value in {**(inputs or {}), **kwargs}.items():
+            if name not in self.inputs:
+                raise TemplateError(f"{self.name}: unknown input {name!r}")
+            values[name] = value
+        return values
+
+    def layout(self, values):
+        """[(block, paint)] for every block drawn for these (bound) inputs."""
+        env = {"W": self.page_size[0], "H": self.page_size[1], **values}
+        for name, expr in self.vars.items():
+            env[name] = expr(env)
+        ctx = _Layout(self, values)
+        placed = []
+        for block in self.blocks:
+            if block.when is not None and not block.when(env):
+                if block.id:
+                    env[block.id] = None
+                continue
+            result = block.place(env, ctx)
+            if block.id:
+                env[block.id] = result[0] if result else None
+            if result:
+                placed.append((block, result[1]))
+        return placed
+
+    def _background(self, dpi):
+        size = fcCanvas.pixel_size(self.page_size, dpi)
+        bg = self.background
+        if "image" in bg:
+            return fcAssetCache.fitted_background(bg["image"], size, centering=tuple(bg.get("centering", (0.5, 0.5))))
+        return Image.new("RGB", size, bg.get("colour", "white"))
+
+    def _layer_stamps(self):
+        files = [self.background["image"]] if "image" in self.background else []
+        files += [b.asset for b in self._all_blocks() if b.static and getattr(b, "asset", None)]
+        return tuple(fcAssetCache.file_stamp(f) for f in files)
+
+    def _static_layer(self, values, placed, dpi):
+        pins = tuple(values[name] for name in self.static_inputs)
+        # Asset stamps too, so an edited background or logo isn't served from an old layer
+        key = (self.key, dpi, tuple(_input_key(v) for v in pins), self._layer_stamps())
+        with _layers_lock:
+            hit = _layers.get(key)
+            if hit is not None:
+                _layers.move_to_end(key)
+                return hit[1]
+        with fcTrace.span("static_layer"):
+            img = self._background(dpi)
+            target = fcCanvas.draw_targets(img, self.page_size, dpi)
+            for block, paint in placed:
+                if block.static:
+                    paint(*target)
+        with _layers_lock:
+            _layers[key] = (pins, img)
+            while len(_layers) > STATIC_LAYER_CACHE_SIZE:
+                _layers.popitem(last=False)
+        return img
+
+    def render(self, inputs=None, dpi=fcCanvas.PAGE_DPI, **kwargs) -> Image.Image:
+        """Raster poster at `dpi`; static blocks come from the cached layer."""
+        with fcTrace.span(f"{self.name}.render", dpi=dpi):
+            values = self.bind(inputs, **kwargs)
+            with fcTrace.span("layout"):
+                placed = self.layout(values)
+            img = self._static_layer(values, placed, dpi).copy()
+            target = fcCanvas.draw_targets(img, self.page_size, dpi)
+            with fcTrace.span("draw"):
+                for block, paint in placed:
+                    if not block.static:
+                        paint(*target)
+        return img
+
+    def draw_vector(self, page, inputs=None, **kwargs):
+        """
+        Draw the poster onto a vector page (fcVectorPdf.PdfPage or
+        fcPdfBatch.StreamPage); raises VectorUnsupported when it can't be
+        drawn as vectors.
+        """
+        values = self.bind(inputs, **kwargs)
+        with fcTrace.span("layout"):
+            placed = self.layout(values)
+        bg = self.background
+        if "image" in bg:
+            photo = _cover_photo(bg["image"], fcAssetCache.file_stamp(bg["image"]), self.page_size,
+                                 tuple(bg.get("centering", (0.5, 0.5))))
+            page.image(photo, (0, 0, *self.page_size), jpeg_quality=fcVectorPdf.BACKGROUND_JPEG_QUALITY)
+        elif bg.get("colour") not in (None, "white", (255, 255, 255)):
+            page.rectangle([(0, 0), (self.page_size[0] - 1, self.page_size[1] - 1)], fill=bg["colour"])
+        # Same z-order as the raster: static layer first
+        for block, paint in sorted(placed, key=lambda bp: not bp[0].static):
+            paint(page, page)
+
+    def to_pdf_vector(self, inputs=None, **kwargs) -> bytes:
+        """Vector PDF (see fcVectorPdf); raises VectorUnsupported when it can't be drawn as vectors."""
+        page = fcVectorPdf.PdfPage(self.page_size, dpi=fcCanvas.PAGE_DPI)
+        self.draw_vector(page, inputs, **kwargs)
+        with fcTrace.span("encode.pdf_vector"):
+            return page.save()
+
+    def to_pdf(self, inputs=None, **kwargs) -> bytes:
+        """Vector PDF, or the raster PDF when the poster can't be drawn as vectors."""
+        with fcTrace.span(f"{self.name}.pdf"):
+            try:
+                return self.to_pdf_vector(inputs, **kwargs)
+            except fcVectorPdf.VectorUnsupported:
+                return to_pdf_bytes_raster(self.render(inputs, **kwargs), self.page_size)
+
+
+@functools.lru_cache(maxsize=4)
+def _cover_photo(path, stamp, page_size, centering):
+    # One crop object per background version, so PDF writers can share it
+    return fcVectorPdf.cover_crop(fcAssetCache.load_image(path, mode="RGB"), page_size, centering=centering)
+
+
+@fcTrace.timed("encode.pdf_raster")
+def to_pdf_bytes_raster(poster_img, page_size):
+    """
+    Single-page PDF holding the rendered bitmap at full size (the
+    "pdf-raster" format). reportlab is imported here so loading a page
+    doesn't pay for it.
+    """
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.utils import ImageReader
+
+    points = 72 / fcCanvas.PAGE_DPI
+    W, H = page_size[0] * points, page_size[1] * points
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(W, H))
+    rgb = poster_img if poster_img.mode == "RGB" else poster_img.convert("RGB")
+    c.drawImage(ImageReader(rgb), 0, 0, width=W, height=H)
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+# --------------------
+# Loading and the render cache
+# --------------------
+
+def template_path(name: str) -> str:
+    return name if name.endswith(".json") else os.path.join(TEMPLATE_DIR, f"{name}.json")
+
+
+def compile_template(spec: dict, path: str = "<template>") -> Plan:
+    digest = hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+    return Plan(spec, path, digest)
+
+
+def load_plan(name: str) -> Plan:
+    """Compiled plan for templates/<name>.json (or a .json path), recompiled when the file changes."""
+    path = template_path(name)
+    stamp = fcAssetCache.file_stamp(path)
+    abspath = os.path.abspath(path)
+    with _plans_lock:
+        hit = _plans.get(abspath)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+    with open(path, encoding="utf-8") as f:
+        plan = compile_template(json.load(f), path)
+    with _plans_lock:
+        _plans[abspath] = (stamp, plan)
+    return plan
+
+
+def raster_encoders(plan: Plan) -> dict:
+    """{format: encoder(image)} for every raster-derived format of `plan`."""
+    return {
+        **fcEncoding.png_encoders(),  # "png" plus "png-fast" / "png-balanced" / "png-smallest"
+        "pdf-raster": lambda img: to_pdf_bytes_raster(img, plan.page_size),
+        "preview": fcEncoding.encode_preview,  # on-screen copy, cached like the downloads
+    }
+
+
+def _render_key(plan, key_inputs, dpi):
+    return {"engine": RENDER_VERSION, "template": plan.digest, **key_inputs, "dpi": dpi}
+
+
+def cache_key(plan: Plan, key_inputs: dict, fmt: str, dpi=fcCanvas.PAGE_DPI) -> str:
+    """
+    The fcRenderCache address render_cached would use for `fmt`, without
+    rendering – stable for the same normalized inputs, template, assets
+    and DPI, so it also serves as an HTTP ETag.
+    """
+    return fcRenderCache.cache_key(plan.name, _render_key(plan, key_inputs, dpi), fmt,
+                                   assets=plan.asset_files)
+
+
+def render_cached(plan: Plan, inputs: dict, key_inputs: dict, formats=("png", "pdf"),
+                  poster=None, dpi=fcCanvas.PAGE_DPI) -> dict:
+    """
+    Encoded poster bytes ({format: bytes}) through fcRenderCache.
+    `key_inputs` identify the poster (normalized, hashable); `inputs` are
+    what gets rendered. Pass an already-rendered `poster` (at `dpi`) to
+    encode it instead of rendering again; the vector "pdf" never needs it.
+    The "raster" format is the rendered image itself, not cached, for
+    callers that encode further formats from it later.
+    """
+    key = _render_key(plan, key_inputs, dpi)
+    encoders = raster_encoders(plan)
+    if "raster" in formats and poster is None:
+        poster = plan.render(inputs, dpi=dpi)
+    out = fcRenderCache.get_or_render(
+        plan.name, key, {fmt: encoders[fmt] for fmt in formats if fmt not in ("pdf", "raster")},
+        lambda: poster if poster is not None else plan.render(inputs, dpi=dpi),
+        assets=plan.asset_files,
+        direct={"pdf": lambda: plan.to_pdf(inputs)} if "pdf" in formats else None)
+    if "raster" in formats:
+        out["raster"] = poster
+    return out
@@ -0,0 +1,188 @@
+# fcText – text fitting shared by every poster layout
+# ---------------------------------------------------
+# - fit_font_to_width: one line, shrunk until it fits a width (Event city)
+# - wrap_lines / fit_text_to_box: greedy word wrap and the largest size at
+#   which wrapped text fits a box (Blank Space free text)
+# Fonts are passed as `font_for(size)` so callers decide where they come
+# from (bundled file, upload, fallback chain); every measurement goes
+# through `draw`, so layouts are identical at every render scale.
+
+from PIL import ImageDraw, ImageFont
+
+import fcTrace
+
+
+@fcTrace.timed("text.fit_width")
+def fit_font_to_width(draw, text, font_for, target_size, max_width, min_size=60):
+    """
+    Returns a font that will render `text` no wider than `max_width`.
+    Starts at `target_size` and scales down (one-pass estimate + small refine loop).
+    """
+    # Start at target size
+    font = font_for(target_size)
+
+    # Fast estimate: font size scales ~linearly with text width
+    bbox = draw.textbbox((0, 0), text, font=font, anchor="lt")
+    text_w = bbox[2] - bbox[0]
+    if text_w > 0 and text_w > max_width:
+        scale = max_width / text_w
+        new_size = max(min_size, int(target_size * scale))
+        font = font_for(new_size)
+
+    # Refine to be safe
+    while True:
+        bbox = draw.textbbox((0, 0), text, font=font, anchor="lt")
+        text_w = bbox[2] - bbox[0]
+        if text_w <= max_width or font.size <= min_size:
+            break
+        font = font_for(font.size - 2)
+
+    return font
+
+
+def _measure_words(draw, words, font):
+    """
+    (advance of each word, width of each join between neighbours). A join
+    is the space plus the kerning on both sides of it, so a line's
+    textlength is the sum of its words and joins. Each distinct word and
+    boundary (last char, first char) is measured once.
+    """
+    memo = {}
+
+    def length(s):
+        w = memo.get(s)
+        if w is None:
+            w = memo[s] = draw.textlength(s, font=font)
+        return w
+
+    widths = [length(w) for w in words]
+    joins = [length(f"{a[-1]} {b[0]}") - length(a[-1]) - length(b[0]) for a, b in zip(words, words[1:])]
+    return widths, joins
+
+
+def _greedy_wrap(widths, joins, max_width: float):
+    """Greedy wrap over pre-measured word advances and joins. Returns (start, end) word spans."""
+    spans, start, line_w = [], 0, widths[0]
+    for i in range(1, len(widths)):
+        trial = line_w + joins[i - 1] + widths[i]
+        if trial <= max_width:
+            line_w = trial
+        else:
+            spans.append((start, i))
+            start, line_w = i, widths[i]
+    spans.append((start, len(widths)))
+    return spans
+
+
+def wrap_lines(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont, max_width: int):
+    """
+    Greedy space-based wrap so each line <= max_width pixels, as measured
+    by textlength of the whole line. Basic-layout fonts add up across
+    words, so each word is measured once (see _measure_words); shaped
+    (Raqm) fonts needn't, so their trial lines are measured whole.
+    """
+    words = (text or "").split()
+    if not words:
+        return [""]
+    if getattr(font, "layout_engine", None) == ImageFont.Layout.BASIC:
+        widths, joins = _measure_words(draw, words, font)
+        return [" ".join(words[a:b]) for a, b in _greedy_wrap(widths, joins, max_width)]
+    lines, line = [], ""
+    for w in words:
+        trial = f"{line} {w}" if line else w
+        if not line or draw.textlength(trial, font=font) <= max_width:
+            line = trial
+        else:
+            lines.append(line)
+            line = w
+    lines.append(line)
+    return lines
+
+
+@fcTrace.timed("text.fit_box")
+def fit_text_to_box(
+    draw: ImageDraw.ImageDraw,
+    text: str,
+    font_for,
+    max_width: int,
+    max_height: int,
+    max_font_size: int = 300,
+    min_font_size: int = 16,
+    line_gap: float = 0.15,
+):
+    """
+    Find the largest font size so wrapped text fits inside (max_width x max_height).
+
+    Every word is measured once at max_font_size. Advances and ink extents
+    scale linearly with size, so the best size is predicted without touching
+    FreeType; the prediction and its neighbour are then checked with the
+    real font (a binary search over the rest only if the model is off by
+    more than one size). Wrapping can make the fit non-monotonic in size
+    (a larger font may fit by breaking into fewer lines); then this finds
+    the largest fitting size around the prediction, which may differ from
+    the size the old blind binary search happened to stop at.
+    Returns (font, lines, line_height_px, line_gap_px).
+    """
+    words = (text or "").split()
+    ref_size = max_font_size
+    ref_font = font_for(ref_size)
+    if not words:
+        bbox = draw.textbbox((0, 0), "", font=ref_font, anchor="lt")
+        line_h = bbox[3] - bbox[1]
+        return ref_font, [""], line_h, int(line_h * line_gap)
+
+    advances, joins = _measure_words(draw, words, ref_font)
+    inks = [draw.textbbox((0, 0), w, font=ref_font, anchor="lt") for w in words]
+
+    def predicted_height(size):
+        k = size / ref_size
+        spans = _greedy_wrap(advances, joins, max_width / k)
+        a, b = spans[0]
+        ink_h = max(inks[i][3] for i in range(a, b)) - min(inks[i][1] for i in range(a, b))
+        line_h = int(ink_h * k)
+        return line_h * len(spans) + int(line_h * line_gap) * (len(spans) - 1)
+
+    def layout(size):
+        # Real check at `size`: one measurement per word plus the first-line box
+        font = font_for(size)
+        lines = wrap_lines(draw, text, font, max_width)
+        bbox = draw.textbbox((0, 0), lines[0], font=font, anchor="lt")
+        line_h = bbox[3] - bbox[1]
+        gap_px = int(line_h * line_gap)
+        fits = line_h * len(lines) + gap_px * (len(lines) - 1) <= max_height
+        return fits, (font, lines, line_h, gap_px)
+
+    # Predict: binary search over the linear model (arithmetic only)
+    lo, hi, size = min_font_size, max_font_size, min_font_size
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if predicted_height(mid) <= max_height:
+            size, lo = mid, mid + 1
+        else:
+            hi = mid - 1
+
+    # Check the prediction and its neighbour with the real font; the model
+    # is almost always right or one size off. Only when both miss does a
+    # binary search run, over the remaining side of the range.
+    fits, result = layout(size)
+    if fits:
+        best, lo, hi, probe = result, size + 1, max_font_size, size + 1
+    else:
+        best, lo, hi, probe = None, min_font_size, size - 1, size - 1
+    if lo <= probe <= hi:
+        fits, result = layout(probe)
+        if fits:
+            best, lo = result, probe + 1
+        else:
+            hi = probe - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        fits, result = layout(mid)
+        if fits:
+            best, lo = result, mid + 1
+        else:
+            hi = mid - 1
+    if best is None:
+        # Nothing fits: the smallest font, even though it overflows
+        best = layout(min_font_size)[1]
+    return best
@@ -0,0 +1,76 @@
+# fcTodayRender – headless "Today's Date" poster renderer
+# --------------------------------------------------------
+# No Streamlit dependency: imported by the fcTodayPoster page, the
+# fcassets batch CLI and anything else that needs posters in bulk.
+# The layout lives in templates/today.json (see fcTemplates); only the two
+# date lines are drawn per request, over the cached static layer.
+
+#%% Import Packages
+from zoneinfo import ZoneInfo
+
+import fcCanvas
+import fcPdfBatch
+import fcTemplates
+
+#%% Key inputs
+
+TEMPLATE = "today"
+LOGO_PATH = "Forever Canadian No Background.png"
+QR_PATH = "qrcode.png"
+APP_TZ = ZoneInfo("America/Edmonton")  # <- change if needed
+
+POSTER_WIDTH, POSTER_HEIGHT = 2550, 3300  # 8.5x11 in, in page units (1/300 in)
+PAGE_SIZE = (POSTER_WIDTH, POSTER_HEIGHT)
+
+#%% Function definition
+
+def plan():
+    return fcTemplates.load_plan(TEMPLATE)
+
+def render_poster(date_str1, date_str2, dpi=fcCanvas.PAGE_DPI):
+    return plan().render({"date_str1": date_str1, "date_str2": date_str2}, dpi=dpi)
+
+def to_pdf_bytes_vector(date_str1, date_str2):
+    """
+    Letter-size vector PDF: text and rules drawn natively, only the logo
+    and QR embedded as images. Falls back to the raster PDF if the fonts
+    can't be embedded.
+    """
+    return plan().to_pdf({"date_str1": date_str1, "date_str2": date_str2})
+
+def write_batch_pdf(out, rows, progress=None):
+    """
+    Stream one printable PDF with a page per row ({"date_str1", "date_str2"})
+    to `out`, a binary file or response. Logo, QR and fonts are stored once
+    however many pages. Returns the page count.
+    """
+    return fcPdfBatch.write_plan_pdf(out, plan(), rows, progress=progress)
+
+def format_dates(date):
+    """The two date strings printed on the poster, e.g. ('Fri, Oct 17, 2026', '10/17/2026')."""
+    if not date:
+        return "", ""
+    return date.strftime("%a, %b %d, %Y"), date.strftime("%m/%d/%Y")
+
+#%% Render cache
+
+RENDER_VERSION = 5  # bump whenever the layout or encoding changes
+
+def render_poster_cached(date_str1, date_str2, formats=("png", "pdf"), poster=None,
+                         dpi=fcCanvas.PAGE_DPI):
+    """
+    Encoded poster bytes ({format: bytes}) for the given dates. Served from
+    fcRenderCache when the same poster was produced before; render_poster
+    only runs on a miss, and not at all for the vector "pdf". Pass an
+    already-rendered `poster` (at `dpi`) to encode it instead of rendering
+    again.
+    """
+    inputs = {"date_str1": date_str1, "date_str2": date_str2}
+    return fcTemplates.render_cached(plan(), inputs, {"v": RENDER_VERSION, **inputs},
+                                     formats, poster=poster, dpi=dpi)
+
+
+def cache_key(date_str1, date_str2, fmt="png", dpi=fcCanvas.PAGE_DPI) -> str:
+    """fcRenderCache key of this poster in `fmt`, without rendering (see fcTemplates.cache_key)."""
+    inputs = {"date_str1": date_str1, "date_str2": date_str2}
+    return fcTemplates.cache_key(plan(), {"v": RENDER_VERSION, **inputs}, fmt, dpi)
@@ -0,0 +1,246 @@
+# fcTrace – lightweight timing spans for the render and export paths
+# ------------------------------------------------------------------
+# - `with span("event.render"):` / `@timed("text.fit_box")` time a stage;
+#   spans nest per thread, so a render shows where its time went
+# - Every span lands in a process-wide histogram (prometheus_text, and an
+#   optional /metrics endpoint when FC_METRICS_PORT is set)
+# - Each finished top-level span is logged as one JSON line on the
+#   "fc.trace" logger (printed to stderr when FC_TRACE_LOG=1)
+# - collect() gathers the spans of one request, e.g. for the Streamlit
+#   debug panel; bind() carries it into pool threads, merge() brings spans
+#   back from worker processes
+# Overhead is two perf_counter calls and a dict update per span; set
+# FC_TRACE=0 to turn spans into no-ops.
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+ENABLED = os.environ.get("FC_TRACE", "1") != "0"
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+METRIC_NAME = "fc_span_seconds"
+
+log = logging.getLogger("fc.trace")
+if os.environ.get("FC_TRACE_LOG") == "1" and not log.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+
+_lock = threading.Lock()
+_histograms: dict = {}  # span name -> [bucket counts..., +Inf count, sum]
+_local = threading.local()
+
+
+class Trace:
+    """Finished top-level spans (with their children) of one request."""
+
+    def __init__(self):
+        self.spans = []  # list.append is atomic, so pool threads can add to it
+
+    def rows(self):
+        """[(depth, name, ms)] in start order, children under their parent."""
+        out = []
+
+        def walk(node, depth):
+            out.append((depth, node["name"], node["ms"]))
+            for child in node["children"]:
+                walk(child, depth + 1)
+
+        for root in self.spans:
+            walk(root, 0)
+        return out
+
+
+def _observe(name, seconds):
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+                break
+        else:
+            hist[len(BUCKETS)] += 1
+        hist[-1] += seconds
+
+
+def _finish(node):
+    stack = _local.stack
+    stack.pop()
+    _observe(node["name"], node["ms"] / 1000)
+    if stack:
+        stack[-1]["children"].append(node)
+        return
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.spans.append(node)
+    if log.isEnabledFor(logging.INFO):
+        log.info(json.dumps({"ts": round(time.time(), 3), "thread": threading.current_thread().name,
+                             **_as_log(node)}, default=str))
+
+
+def _as_log(node):
+    entry = {"span": node["name"], "ms": round(node["ms"], 2)}
+    if node["attrs"]:
+        entry["attrs"] = node["attrs"]
+    if node["children"]:
+        entry["children"] = [_as_log(child) for child in node["children"]]
+    return entry
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time the enclosed block as stage `name`; `attrs` go to the JSON log."""
+    if not ENABLED:
+        yield
+        return
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    node = {"name": name, "attrs": attrs, "children": [], "ms": 0.0}
+    stack.append(node)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        node["ms"] = (time.perf_counter() - start) * 1000
+        _finish(node)
+
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorate(fn):
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        wrapper.__name__, wrapper.__doc__, wrapper.__wrapped__ = fn.__name__, fn.__doc__, fn
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def collect(trace=None):
+    """Collect this thread's top-level spans into `trace` (a new Trace by default)."""
+    trace = trace or Trace()
+    previous = getattr(_local, "trace", None)
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+def bind(fn, trace):
+    """`fn` wrapped so its spans are collected into `trace` on whichever thread runs it."""
+    def run(*args, **kwargs):
+        with collect(trace):
+            return fn(*args, **kwargs)
+    return run
+
+
+def merge(spans, trace=None):
+    """
+    Count top-level spans finished in another process (e.g. a render
+    worker) in this process's histograms, and add them to `trace`.
+    """
+    def observe(node):
+        _observe(node["name"], node["ms"] / 1000)
+        for child in node["children"]:
+            observe(child)
+
+    for root in spans:
+        observe(root)
+        if trace is not None:
+            trace.spans.append(root)
+
+
+# --------------------
+# Process-wide histograms
+# --------------------
+
+def summary():
+    """{span name: {"count", "total_ms", "mean_ms", "p95_ms"}}; p95 is a bucket upper bound."""
+    with _lock:
+        snapshot = {name: list(hist) for name, hist in _histograms.items()}
+    out = {}
+    for name, hist in sorted(snapshot.items()):
+        count = sum(hist[:-1])
+        running, p95 = 0, None
+        for i, n in enumerate(hist[:-1]):
+            running += n
+            if running >= 0.95 * count:
+                p95 = BUCKETS[i] * 1000 if i < len(BUCKETS) else None
+                break
+        out[name] = {"count": count, "total_ms": hist[-1] * 1000,
+                     "mean_ms": hist[-1] * 1000 / count, "p95_ms": p95}
+    return out
+
+
+def prometheus_text() -> str:
+    """Histograms in the Prometheus text exposition format."""
+    with _lock:
+        snapshot = {name: list(hist) for name, hist in _histograms.items()}
+    lines = [f"# HELP {METRIC_NAME} Time spent in instrumented render and export stages.",
+             f"# TYPE {METRIC_NAME} histogram"]
+    for name, hist in sorted(snapshot.items()):
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        running = 0
+        for bound, n in zip(BUCKETS, hist):
+            running += n
+            lines.append(f'{METRIC_NAME}_bucket{{span="{label}",le="{bound:g}"}} {running}')
+        running += hist[len(BUCKETS)]
+        lines.append(f'{METRIC_NAME}_bucket{{span="{label}",le="+Inf"}} {running}')
+        lines.append(f'{METRIC_NAME}_sum{{span="{label}"}} {hist[-1]:.6f}')
+        lines.append(f'{METRIC_NAME}_count{{span="{label}"}} {running}')
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+_server = None
+
+
+def start_metrics_server(port=None, host="127.0.0.1"):
+    """
+    Serve prometheus_text() at http://host:port/metrics from a daemon
+    thread (once per process). Defaults to FC_METRICS_PORT; does nothing
+    when no port is configured. Returns the server or None.
+    """
+    global _server
+    port = port or os.environ.get("FC_METRICS_PORT")
+    if not port:
+        return None
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, int(port)), Handler)
+            except OSError:
+                return None  # e.g. another Streamlit worker already serves the port
+            threading.Thread(target=_server.serve_forever, name="fc-metrics", daemon=True).start()
+    return _server
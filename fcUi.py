@@ -0,0 +1,233 @@
+# fcUi – small Streamlit helpers shared by the poster pages
+# ---------------------------------------------------------
+# Shared resources are cached with st.cache_resource, so they are computed
+# once per server process and shared across reruns and sessions (the
+# render worker pool among them); each session's generated poster lives in
+# st.session_state.
+
+import os
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+import streamlit as st
+from PIL import Image
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import fcDrafts
+import fcEncoding
+import fcPrewarm
+import fcRenderService
+import fcTrace
+
+SAMPLE_MAX_WIDTH = 900  # px; samples are shown in a half-width column
+
+
+@st.cache_resource(show_spinner=False)
+def sample_image(path, max_width=SAMPLE_MAX_WIDTH):
+    """
+    Sample poster shown next to a form, downscaled and encoded once.
+    Sending the full-size PNG made every rerun re-read and re-process it.
+    Returns None when the file is missing.
+    """
+    if not os.path.exists(path):
+        return None
+    with Image.open(path) as src:
+        src.load()
+        return fcEncoding.encode_preview(src, max_width=max_width)
+
+
+# --------------------
+# Generated posters: rendered by the shared worker pool
+# --------------------
+
+PREVIEW_TIMEOUT = 60.0  # seconds a rerun waits for its preview before asking to check back
+POLL_SECONDS = 0.25
+
+
+@st.cache_resource(show_spinner=False)
+def render_service():
+    """Render worker processes shared by all sessions (see fcRenderService), kept warm by fcPrewarm."""
+    service = fcRenderService.RenderService()
+    fcPrewarm.start(service)
+    return service
+
+
+def session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "local"
+
+
+def request_poster(state_key, poster_id, name, generator, args):
+    """
+    Queue a full-size poster for this session on render_service(): its
+    preview and every download format (render_poster_cached(*args)) are
+    made in the worker processes. Asking for the same poster again reuses
+    the queued (or finished) jobs. Returns the session entry, or None with
+    a message shown when this session or the server is busy.
+    """
+    entry = st.session_state.get(state_key)
+    if entry is not None and entry["id"] == poster_id:
+        return entry
+    trace = fcTrace.Trace()
+    try:
+        tickets = render_service().submit_poster(session_id(), poster_id, generator, args, trace=trace)
+    except fcRenderService.SessionBusy:
+        st.warning("⏳ Your previous poster is still being made – try again in a moment.")
+        return None
+    except fcRenderService.ServiceBusy:
+        st.warning("🚦 Lots of posters are being made right now – please try again in a minute.")
+        return None
+    entry = {
+        "id": poster_id,
+        "name": name,
+        "tickets": tickets,
+        "futures": {fmt: t.future for fmt, t in tickets.items() if fmt != "preview"},
+        "trace": trace,
+        "submitted": time.perf_counter(),
+    }
+    st.session_state[state_key] = entry
+    return entry
+
+
+def wait_for_preview(state_key, timeout=PREVIEW_TIMEOUT):
+    """
+    This session's poster preview, waiting for it with its place in the
+    queue shown. Returns None (with a message) while it is still queued
+    after `timeout`, or when it failed – then the entry is dropped so
+    'Generate Poster' starts over.
+    """
+    entry = st.session_state.get(state_key)
+    if entry is None or "preview" in entry:
+        return entry and entry["preview"]
+    ticket = entry["tickets"]["preview"]
+    status = st.empty()
+    deadline = time.monotonic() + timeout
+    while not ticket.done():
+        ahead = ticket.position()
+        if ahead is None:
+            status.info("🖌️ Drawing your poster…")
+        elif ahead:
+            status.info(f"⏳ {ahead} poster(s) ahead of yours – hang tight…")
+        else:
+            status.info("⏳ Your poster is next…")
+        if time.monotonic() > deadline:
+            status.warning("⏳ Still waiting for a free renderer – this page will show the poster "
+                           "when you press 'Generate Poster' again.")
+            return None
+        time.sleep(POLL_SECONDS)
+    status.empty()
+    try:
+        preview = ticket.result()
+    except Exception as e:
+        st.session_state.pop(state_key, None)
+        st.error(f"❌ The poster couldn't be made ({e}). Please try again.")
+        return None
+    entry["preview"] = preview
+    entry["preview_stats"] = {
+        "format": fcEncoding.PREVIEW_FORMAT,
+        "bytes": len(preview),
+        "ms": (time.perf_counter() - entry["submitted"]) * 1000,
+    }
+    return preview
+
+
+def preview_caption(entry, label="Preview"):
+    """Caption with what the preview cost, e.g. 'Preview · WEBP 68 KB in 129 ms' (queueing included)."""
+    stats = entry["preview_stats"]
+    return f"{label} · {stats['format']} {stats['bytes'] / 1024:.0f} KB in {stats['ms']:.0f} ms"
+
+
+def poster_download_button(label, entry, fmt):
+    """Download button whose bytes come from the worker's encode (waited on only when clicked)."""
+    return st.download_button(
+        label,
+        data=entry["futures"][fmt].result,
+        file_name=f"{entry['name']}.{fcEncoding.file_extension(fmt)}",
+        mime=fcEncoding.mime_type(fmt),
+        on_click="ignore",
+    )
+
+
+# --------------------
+# Live draft preview while the form is edited
+# --------------------
+
+DRAFT_WORKERS = 2
+DRAFT_POLL_SECONDS = 0.25  # how often a page checks for a draft still being rendered
+
+
+@st.cache_resource(show_spinner=False)
+def draft_pool():
+    """Thread pool shared by all sessions for low-resolution draft renders."""
+    return ThreadPoolExecutor(max_workers=DRAFT_WORKERS, thread_name_prefix="fc-draft")
+
+
+def live_draft(state_key, render_poster, args):
+    """
+    Draft of `render_poster(*args, dpi=...)` for this session's current
+    form values (see fcDrafts). Requests are debounced and latest-only, so
+    a rerun that gets superseded leaves no work behind. Never waits: returns
+    the newest finished draft (None before the first one) and reruns the
+    page once the requested draft is ready. A draft that fails to render
+    is reported with st.error, like a failed poster, and the last good one
+    stays up.
+    """
+    drafts = st.session_state.get(state_key)
+    if drafts is None:
+        drafts = fcDrafts.LatestOnly(lambda a: fcDrafts.render_draft(render_poster, a), draft_pool())
+        st.session_state[state_key] = drafts
+    future = drafts.request(args)
+    if not future.done():
+        _rerun_when_done(future)
+        return drafts.last
+    try:
+        return future.result() or drafts.last
+    except CancelledError:
+        return drafts.last
+    except Exception as e:
+        st.error(f"❌ The preview couldn't be drawn ({e}).")
+        return drafts.last
+
+
+@st.fragment(run_every=DRAFT_POLL_SECONDS)
+def _rerun_when_done(future):
+    """Polls `future` without holding the script thread; reruns the page when it resolves."""
+    if future.done():
+        st.rerun()
+
+
+def draft_caption(draft, label="Draft preview"):
+    """e.g. 'Draft preview · 72 DPI · WEBP 24 KB in 15 ms'."""
+    return (f"{label} · {draft['dpi']} DPI · {draft['format']} "
+            f"{draft['bytes'] / 1024:.0f} KB in {draft['ms']:.0f} ms")
+
+
+# --------------------
+# Render timings (debug panel)
+# --------------------
+
+def debug_enabled():
+    """Debug panels show with ?debug=1 in the URL, or FC_DEBUG=1 on the server."""
+    return os.environ.get("FC_DEBUG") == "1" or st.query_params.get("debug") == "1"
+
+
+def debug_panel(entry, label="⏱️ Render timings"):
+    """
+    Collapsed panel with where this poster's (or draft's) time went, stage
+    by stage, and the server-wide timing histograms. Background encodes
+    still running appear on a later rerun.
+    """
+    if not debug_enabled() or entry is None or entry.get("trace") is None:
+        return
+    with st.expander(label, expanded=False):
+        rows = entry["trace"].rows()
+        st.dataframe(
+            [{"stage": "\u2003" * depth + name, "ms": round(ms, 1)} for depth, name, ms in rows],
+            hide_index=True, use_container_width=True,
+        )
+        st.caption("All sessions since the server started")
+        st.dataframe(
+            [{"stage": name, "count": s["count"], "mean ms": round(s["mean_ms"], 1),
+              "p95 ms ≤": s["p95_ms"]} for name, s in fcTrace.summary().items()],
+            hide_index=True, use_container_width=True,
+        )
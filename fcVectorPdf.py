@@ -0,0 +1,206 @@
+# fcVectorPdf – draw posters straight into a vector PDF with reportlab
+# -------------------------------------------------------------------
+# PdfPage stands in for both the PIL image and its ImageDraw in the
+# renderers' drawing code, so the raster and vector posters share one
+# layout:
+# - text / line / rectangle become native PDF operators; TrueType fonts
+#   are embedded (subset) from the same files PIL measured with
+# - paste / image embed bitmaps (logo, QR, photo backgrounds) only
+# - textbbox / textlength are answered by PIL, so every layout decision is
+#   made with exactly the same metrics as the raster path
+#
+# Coordinates stay in poster pixels (top-left origin); the page is scaled
+# to points at `dpi`. Anything that cannot be drawn as vectors raises
+# VectorUnsupported so callers can fall back to the raster PDF.
+# reportlab is imported on first use, not when this module loads.
+
+import hashlib
+import io
+import threading
+
+from PIL import Image, ImageColor
+
+import fcFonts
+
+DEFAULT_DPI = 300
+BACKGROUND_JPEG_QUALITY = 90
+
+_font_lock = threading.Lock()
+_font_names = {}  # font file path or content hash -> reportlab font name
+
+
+class VectorUnsupported(Exception):
+    """The poster uses something PdfPage cannot draw as vectors."""
+
+
+def font_source(font):
+    """(cache key, file path or BytesIO) of a PIL FreeTypeFont's TrueType data."""
+    path = getattr(font, "path", None)
+    if isinstance(path, str):
+        return path, path
+    if hasattr(path, "getvalue"):  # uploaded font (fcFonts keeps it in a BytesIO)
+        data = path.getvalue()
+        return hashlib.sha1(data).hexdigest(), io.BytesIO(data)
+    raise VectorUnsupported("bitmap font has no TrueType outlines to embed")
+
+
+def register_font(font) -> str:
+    """reportlab font name for a PIL FreeTypeFont, registering the file once per process."""
+    key, source = font_source(font)
+    with _font_lock:
+        name = _font_names.get(key)
+        if name is None:
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+
+            name = "fc-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+            try:
+                pdfmetrics.registerFont(TTFont(name, source))
+            except Exception as e:  # e.g. CFF-flavoured OpenType, which reportlab can't embed
+                raise VectorUnsupported(f"cannot embed font {key}: {e}") from e
+            _font_names[key] = name
+    return name
+
+
+def pdf_rgb(fill):
+    """PIL colour (name, RGB tuple or grey level) as PDF 0-1 fractions."""
+    if fill is None:
+        fill = (0, 0, 0)
+    elif isinstance(fill, str):
+        fill = ImageColor.getrgb(fill)
+    elif isinstance(fill, int):
+        fill = (fill, fill, fill)
+    return tuple(c / 255 for c in fill[:3])
+
+
+def cover_crop(img: Image.Image, size, centering=(0.5, 0.5)) -> Image.Image:
+    """Crop `img` to the aspect ratio of `size` the way ImageOps.fit does, without resizing."""
+    w, h = img.size
+    target = size[0] / size[1]
+    if w / h > target:
+        crop_w, crop_h = round(h * target), h
+    else:
+        crop_w, crop_h = w, round(w / target)
+    left = round((w - crop_w) * centering[0])
+    top = round((h - crop_h) * centering[1])
+    return img.crop((left, top, left + crop_w, top + crop_h))
+
+
+class PdfPage:
+    """One PDF page that accepts the ImageDraw/Image calls the renderers make."""
+
+    def __init__(self, size, dpi=DEFAULT_DPI):
+        from reportlab.pdfgen import canvas
+
+        self.size = self.width, self.height = size
+        self.scale = 72.0 / dpi
+        self._buf = io.BytesIO()
+        self._canvas = canvas.Canvas(
+            self._buf, pagesize=(size[0] * self.scale, size[1] * self.scale), pageCompression=1)
+        self._measure = fcFonts.Measure()
+
+    def _x(self, x):
+        return x * self.scale
+
+    def _y(self, y):
+        return (self.height - y) * self.scale
+
+    # -- measurement (PIL metrics, identical to the raster path) --
+
+    def textbbox(self, xy, text, font=None, anchor=None, **kwargs):
+        return self._measure.textbbox(xy, text, font=font, anchor=anchor, **kwargs)
+
+    def textlength(self, text, font=None, **kwargs):
+        return self._measure.textlength(text, font=font, **kwargs)
+
+    # -- drawing --
+
+    def text(self, xy, text, fill=None, font=None, anchor=None, **kwargs):
+        if not text:
+            return
+        if font is None or "\n" in text:
+            raise VectorUnsupported("only single-line TrueType text is supported")
+        name = register_font(font)
+        size_pt = font.size * self.scale
+        h_anchor, v_anchor = (anchor or "la")
+        ascent, descent = font.getmetrics()
+        x, y = xy
+        baseline = {"a": y + ascent, "s": y, "d": y - descent}.get(v_anchor)
+        if baseline is None or h_anchor not in "lmr":
+            raise VectorUnsupported(f"unsupported text anchor {anchor!r}")
+
+        c = self._canvas
+        c.setFillColorRGB(*pdf_rgb(fill))
+        c.setFont(name, size_pt)
+        px, py = self._x(x), self._y(baseline)
+        if h_anchor == "m":
+            c.drawCentredString(px, py, text)
+        elif h_anchor == "r":
+            c.drawRightString(px, py, text)
+        else:
+            c.drawString(px, py, text)
+
+    def line(self, xy, fill=None, width=0, **kwargs):
+        points = [tuple(p) for p in xy] if isinstance(xy[0], (tuple, list)) else list(zip(xy[::2], xy[1::2]))
+        c = self._canvas
+        c.setStrokeColorRGB(*pdf_rgb(fill))
+        c.setLineWidth(max(width, 1) * self.scale)
+        c.setLineCap(0)  # butt ends, like PIL
+        path = c.beginPath()
+        path.moveTo(self._x(points[0][0]), self._y(points[0][1]))
+        for px, py in points[1:]:
+            path.lineTo(self._x(px), self._y(py))
+        c.drawPath(path, stroke=1, fill=0)
+
+    def rectangle(self, xy, fill=None, outline=None, width=1):
+        (x0, y0), (x1, y1) = xy if isinstance(xy[0], (tuple, list)) else (xy[:2], xy[2:])
+        # PIL boxes are inclusive and outlines grow inwards from the box edge
+        x1, y1 = x1 + 1, y1 + 1
+        c = self._canvas
+        if fill is not None:
+            c.setFillColorRGB(*pdf_rgb(fill))
+            c.rect(self._x(x0), self._y(y1), (x1 - x0) * self.scale, (y1 - y0) * self.scale,
+                   stroke=0, fill=1)
+        if outline is not None and width > 0:
+            half = width / 2
+            c.setStrokeColorRGB(*pdf_rgb(outline))
+            c.setLineWidth(width * self.scale)
+            c.setLineJoin(0)
+            c.rect(self._x(x0 + half), self._y(y1 - half),
+                   (x1 - x0 - width) * self.scale, (y1 - y0 - width) * self.scale,
+                   stroke=1, fill=0)
+
+    def paste(self, im, box=None, mask=None):
+        """Embed `im` at its pixel size with its top-left corner at `box`."""
+        x, y = (box or (0, 0))[:2]
+        self.image(im, (x, y, x + im.width, y + im.height), mask=mask)
+
+    def image(self, im, box, mask=None, jpeg_quality=None):
+        """
+        Embed `im` scaled into `box` (x0, y0, x1, y1). Alpha comes from `mask`
+        (or the image's own alpha); `jpeg_quality` stores opaque photos as JPEG.
+        """
+        from reportlab.lib.utils import ImageReader
+
+        if mask is not None and mask is not im:
+            alpha = mask.getchannel("A") if mask.mode in ("RGBA", "LA") else mask.convert("L")
+            im = im.convert("RGB")
+            im.putalpha(alpha)
+        has_alpha = mask is not None and im.mode in ("RGBA", "LA")
+        if jpeg_quality and not has_alpha:
+            buf = io.BytesIO()
+            im.convert("RGB").save(buf, format="JPEG", quality=jpeg_quality)
+            buf.seek(0)
+            source = ImageReader(buf)  # JPEG data is embedded as-is (DCTDecode)
+        else:
+            source = ImageReader(im if has_alpha else im.convert("RGB"))
+        x0, y0, x1, y1 = box
+        self._canvas.drawImage(source, self._x(x0), self._y(y1),
+                               width=(x1 - x0) * self.scale, height=(y1 - y0) * self.scale,
+                               mask="auto" if has_alpha else None)
+
+    def save(self) -> bytes:
+        """Finish the page and return the PDF bytes."""
+        self._canvas.showPage()
+        self._canvas.save()
+        return self._buf.getvalue()
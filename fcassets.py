@@ -0,0 +1,330 @@
+# fcassets – command-line poster tools (no Streamlit needed)
+# ----------------------------------------------------------
+# Bulk-render posters from a CSV or JSON list, across a process pool:
+#
+#   python fcassets.py render events.csv --out posters/
+#   python fcassets.py render events.json --format png --format pdf --workers 8
+#   python fcassets.py render dates.csv --generator today --format png-smallest
+#   python fcassets.py render events.csv --format png --dpi 600
+#   python fcassets.py render rows.csv --template my_poster.json
+#   python fcassets.py render events.csv --batch-pdf all_events.pdf
+#
+# Event rows: city, address_line1, address_line2, date, time (or
+#   start_time + end_time), addl_info1, addl_info2 (or extra_lines), question
+# Today rows: date
+# Blank Space rows: text, site_text (optional)
+# Template rows: one column per template input (see fcTemplates); image
+#   inputs take a file path
+#
+# Dates may be ISO (2026-10-17) and are then formatted like the app;
+# anything else is printed as given. Times accept "13:00" or "1:00 PM".
+
+import argparse
+import csv
+import datetime
+import importlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fcAssetCache
+import fcCanvas
+import fcEncoding
+import fcPdfBatch
+import fcTemplates
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+GENERATORS = {
+    "event": "fcEventRender",
+    "today": "fcTodayRender",
+    "blank_space": "fcBlankSpaceRender",
+}
+TRUE_WORDS = {"1", "true", "yes", "y", "on"}
+FORMATS = [*fcEncoding.png_encoders(), *fcEncoding.PDF_FORMATS]
+
+
+#%% Input parsing
+
+def load_rows(path):
+    """Rows from a CSV (header row required) or a JSON list of objects."""
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows.get("events") or rows.get("rows") or []
+        return [dict(r) for r in rows]
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return [{k.strip(): (v or "").strip() for k, v in r.items() if k} for r in csv.DictReader(f)]
+
+
+def _parse_date(value):
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _parse_time(value):
+    text = str(value or "").strip().upper()
+    for fmt in ("%H:%M", "%I:%M %p", "%I:%M%p", "%I %p", "%I%p"):
+        try:
+            return datetime.datetime.strptime(text, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def _truthy(value, default=True):
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_WORDS
+
+
+def event_kwargs(row, fmt):
+    date = row.get("date", "")
+    parsed = _parse_date(date)
+    date_str = fmt.format_event_date(parsed) if parsed else str(date)
+
+    time_str = str(row.get("time", "") or "")
+    if not time_str:
+        start, end = _parse_time(row.get("start_time")), _parse_time(row.get("end_time"))
+        time_str = fmt.format_event_time(start, end)
+
+    extra = row.get("extra_lines") or []
+    if isinstance(extra, str):
+        extra = [part.strip() for part in extra.split("|")]
+    return {
+        "city": str(row.get("city", "")),
+        "address_line1": str(row.get("address_line1", row.get("address", "")) or ""),
+        "address_line2": str(row.get("address_line2", "") or ""),
+        "date_str": date_str,
+        "time_str": time_str,
+        "questionText": _truthy(row.get("question")),
+        "addlInfo1": str(row.get("addl_info1") or (extra[0] if len(extra) > 0 else "")),
+        "addlInfo2": str(row.get("addl_info2") or (extra[1] if len(extra) > 1 else "")),
+    }
+
+
+def today_kwargs(row, fmt):
+    parsed = _parse_date(row.get("date", ""))
+    if parsed is None:
+        raise ValueError(f"today posters need an ISO date, got {row.get('date')!r}")
+    date_str1, date_str2 = fmt.format_dates(parsed)
+    return {"date_str1": date_str1, "date_str2": date_str2}
+
+
+def blank_space_kwargs(row, fmt):
+    return {
+        "free_text": str(row.get("text", row.get("free_text", "")) or ""),
+        "site_text": str(row.get("site_text") or fmt.site_text),
+        "font_file": None,
+    }
+
+
+def template_kwargs(row, plan):
+    """Row columns named like the template's inputs, coerced to the defaults' types."""
+    inputs = {}
+    for name, default in plan.inputs.items():
+        if name not in row:
+            continue
+        value = row[name]
+        if isinstance(default, bool):
+            value = _truthy(value, default)
+        elif isinstance(default, (int, float)):
+            value = type(default)(value)
+        elif name in plan.image_inputs:
+            value = str(value) if value else None
+        else:
+            value = str(value or "")
+        inputs[name] = value
+    return {"template": plan.path, "inputs": inputs}
+
+
+ROW_PARSERS = {"event": event_kwargs, "today": today_kwargs, "blank_space": blank_space_kwargs}
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")[:60] or "poster"
+
+
+def output_stem(generator, index, kwargs):
+    """File name stem for one poster; `index` (the row number) prefixes batch output, None leaves it off."""
+    prefix = "" if index is None else f"{index:04d}_"
+    if generator == "event":
+        return f"{prefix}{_slug(kwargs['city'])}_{_slug(kwargs['date_str'])}"
+    if generator == "today":
+        return f"{kwargs['date_str2'].replace('/', '')}_Date_Poster"
+    if generator == "template":
+        return f"{prefix}{_slug(os.path.splitext(os.path.basename(kwargs['template']))[0])}"
+    return f"{prefix}blank_space"
+
+
+#%% Rendering
+
+def template_values(plan, inputs):
+    """Template inputs with image paths loaded, and the stamps of those images."""
+    values = dict(inputs)
+    images = {}
+    for name in plan.image_inputs:
+        if values.get(name):
+            images[name] = fcAssetCache.file_stamp(values[name])
+            values[name] = fcAssetCache.load_image(values[name])
+    return values, images
+
+
+def render_template_cached(template, inputs, formats, dpi=fcCanvas.PAGE_DPI):
+    """Encoded poster bytes for one row of a --template run; image inputs are file paths."""
+    plan = fcTemplates.load_plan(template)
+    values, images = template_values(plan, inputs)
+    return fcTemplates.render_cached(plan, values, {"inputs": inputs, "images": images},
+                                     formats, dpi=dpi)
+
+
+def render_job(generator, kwargs, formats, out_stem):
+    """Render one poster and write one file per format. Runs in a worker process."""
+    if generator == "template":
+        encoded = render_template_cached(**kwargs, formats=tuple(formats))
+    else:
+        module = importlib.import_module(GENERATORS[generator])
+        encoded = module.render_poster_cached(**kwargs, formats=tuple(formats))
+    paths = []
+    for fmt, data in encoded.items():
+        profile = fmt.partition("-")[2]
+        path = f"{out_stem}{'_' + profile if profile else ''}.{fcEncoding.file_extension(fmt)}"
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+
+def _call(fn, *args):
+    try:
+        return fn(*args), None
+    except Exception as e:
+        return None, e
+
+
+def batch_pdf_command(generator, jobs, path):
+    """Stream every job into one multi-page PDF at `path`, in row order."""
+    started = time.perf_counter()
+    print(f"🖨️ Writing {len(jobs)} page(s) to {path}…")
+    rows = [dict(kwargs) for _, kwargs, _, _ in jobs]
+    for row in rows:
+        row.pop("dpi", None)
+    progress = lambda n: print(f"   ✅ page {n}/{len(rows)}") if n % 50 == 0 or n == len(rows) else None
+    with open(path, "wb") as f:
+        if generator == "template":
+            plan = fcTemplates.load_plan(rows[0]["template"])
+            pages = fcPdfBatch.write_plan_pdf(
+                f, plan, (template_values(plan, row["inputs"])[0] for row in rows), progress=progress)
+        else:
+            module = importlib.import_module(GENERATORS[generator])
+            pages = module.write_batch_pdf(f, rows, progress=progress)
+    elapsed = time.perf_counter() - started
+    print(f"🎉 Done: {pages} page(s) in {elapsed:.1f}s → {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return 0
+
+
+def render_command(args):
+    rows = load_rows(args.input)
+    out_dir = os.path.abspath(args.out)
+    formats = args.format or ["png", "pdf"]
+    template = os.path.abspath(args.template) if args.template else None
+    batch_pdf = os.path.abspath(args.batch_pdf) if args.batch_pdf else None
+    if not batch_pdf:
+        os.makedirs(out_dir, exist_ok=True)
+    generator = "template" if template else args.generator
+
+    # Asset and font paths in the renderers are relative to the repo
+    os.chdir(REPO_DIR)
+    if template:
+        try:
+            plan = fcTemplates.load_plan(template)
+        except (OSError, ValueError) as e:
+            print(f"❌ {args.template}: {e}", file=sys.stderr)
+            return 1
+        parse = lambda row: template_kwargs(row, plan)
+    else:
+        module = importlib.import_module(GENERATORS[generator])
+        parse = lambda row: ROW_PARSERS[generator](row, module)
+    jobs = []
+    for i, row in enumerate(rows, start=1):
+        try:
+            kwargs = parse(row)
+        except ValueError as e:
+            print(f"⚠️ Row {i} skipped: {e}", file=sys.stderr)
+            continue
+        kwargs["dpi"] = args.dpi
+        jobs.append((generator, kwargs, formats,
+                     os.path.join(out_dir, output_stem(generator, i, kwargs))))
+    if not jobs:
+        print("ℹ️ Nothing to render.")
+        return 1
+    if batch_pdf:
+        return batch_pdf_command(generator, jobs, batch_pdf)
+
+    started = time.perf_counter()
+    failures = 0
+    workers = args.workers or os.cpu_count() or 1
+    print(f"🖨️ Rendering {len(jobs)} {plan.name if template else generator} poster(s) with {workers} worker(s)…")
+    if workers == 1:
+        outcomes = ((job, _call(render_job, *job)) for job in jobs)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        futures = {pool.submit(render_job, *job): job for job in jobs}
+        outcomes = ((futures[fut], _call(fut.result)) for fut in as_completed(futures))
+    try:
+        for job, (paths, error) in outcomes:
+            if error is not None:
+                failures += 1
+                print(f"   ❌ {os.path.basename(job[3])}: {error}", file=sys.stderr)
+                continue
+            for path in paths:
+                print(f"   ✅ {os.path.basename(path)}")
+    finally:
+        if workers != 1:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    print(f"🎉 Done: {len(jobs) - failures}/{len(jobs)} poster(s) in {elapsed:.1f}s → {out_dir}")
+    return 1 if failures else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="fcassets", description="Forever Canadian poster tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    render = sub.add_parser("render", help="bulk-render posters from a CSV or JSON list")
+    render.add_argument("input", help="CSV (with header) or JSON list of rows")
+    render.add_argument("--generator", choices=sorted(GENERATORS), default="event")
+    render.add_argument("--template", help="render with a poster template (.json) instead of a generator")
+    render.add_argument("--out", default="posters", help="output folder (default: ./posters)")
+    render.add_argument("--format", action="append", choices=FORMATS,
+                        help="repeat for several formats (default: png and pdf); "
+                             "png-fast / png-smallest pick an encoding profile, "
+                             "pdf-raster flattens the bitmap instead of drawing vectors")
+    render.add_argument("--dpi", type=int, default=fcCanvas.PAGE_DPI,
+                        help=f"raster resolution (default: {fcCanvas.PAGE_DPI}); the vector pdf ignores it")
+    render.add_argument("--batch-pdf", metavar="FILE",
+                        help="write every row as one page of a single PDF (streamed; ignores --format)")
+    render.add_argument("--workers", type=int, default=0,
+                        help="worker processes (default: one per CPU)")
+    render.set_defaults(func=render_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
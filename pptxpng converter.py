@@ -1,92 +1,375 @@
+# pptxpng converter – pages of every PPTX/PDF in a folder as PNGs
+# ---------------------------------------------------------------
+#   python "pptxpng converter.py"                   (asks for folder and DPI)
+#   python "pptxpng converter.py" FOLDER --dpi 300 --workers 4
+#   python "pptxpng converter.py" FOLDER --engine libreoffice --force
+#   python "pptxpng converter.py" FOLDER --pages all --thumbnails 256,1024
+#
+# - PPTX -> PDF with PowerPoint (COM, Windows only) or headless LibreOffice
+#   (Linux/macOS, or Windows without PowerPoint). LibreOffice converts a
+#   batch of decks per start-up, one soffice process per worker.
+# - PDF -> PNG with pdf2image/Poppler across a process pool. By default
+#   only the first page is exported (deck.png); --pages all / 2-5 exports
+#   deck_p001.png, deck_p002.png, ... Pages are written straight to disk by
+#   Poppler (output_folder + paths_only) a few at a time, so a long deck at
+#   300 DPI never sits in memory.
+# - --thumbnails 256,1024 adds deck_256px.png etc. (longest side) next to
+#   each page, made from the page just written – no second render.
+# - A manifest (.pptxpng_manifest.json in the folder) records each file's
+#   content hash, the settings it was exported with and its outputs;
+#   unchanged files whose outputs are still there are skipped. --force
+#   converts everything again.
+
+import argparse
+import hashlib
+import json
 import os
+import shutil
+import subprocess
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # ---- Dependencies:
-# pip install pdf2image comtypes
-# Also install Poppler and add its "bin" to PATH (Windows):
-# https://github.com/oschwartz10612/poppler-windows/releases/
+# pip install pdf2image
+# Poppler: on Windows add its "bin" to PATH
+#   https://github.com/oschwartz10612/poppler-windows/releases/
+#   (Linux: apt install poppler-utils; macOS: brew install poppler)
+# PPTX: PowerPoint + `pip install comtypes` (Windows), or LibreOffice
+#   (apt install libreoffice-impress; macOS: brew install --cask libreoffice)
+
+MANIFEST_NAME = ".pptxpng_manifest.json"
+DEFAULT_DPI = 300
+DEFAULT_PAGES = "1"
+PAGE_CHUNK = 8  # pages per Poppler call; bounds the temp files waiting to be moved
+SOFFICE_TIMEOUT_PER_DECK = 120  # seconds
+SOFFICE_CANDIDATES = [
+    "soffice",
+    "libreoffice",
+    "/Applications/LibreOffice.app/Contents/MacOS/soffice",
+    r"C:\Program Files\LibreOffice\program\soffice.exe",
+]
+
+
+#%% Manifest
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
 
-def main():
-    folder = input("Enter the folder path containing the PPTX/PDF files: ").strip().strip('"')
-    if not os.path.isdir(folder):
-        print("❌ Invalid folder path. Please check and try again.")
-        sys.exit(1)
 
+def load_manifest(folder: Path) -> dict:
     try:
-        dpi_str = input("DPI for PNG export (default 300): ").strip()
-        dpi = int(dpi_str) if dpi_str else 300
-    except ValueError:
-        print("⚠️ Invalid DPI; using 300.")
-        dpi = 300
+        with open(folder / MANIFEST_NAME, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-    folder_path = Path(folder)
 
-    # Collect files
-    pptx_files = sorted(p for p in folder_path.iterdir() if p.suffix.lower() == ".pptx")
-    pdf_files  = sorted(p for p in folder_path.iterdir() if p.suffix.lower() == ".pdf")
+def save_manifest(folder: Path, manifest: dict):
+    # Written to a temp file and swapped in, so an interrupted run never leaves half a manifest
+    tmp = folder / (MANIFEST_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, folder / MANIFEST_NAME)
 
-    if not pptx_files and not pdf_files:
-        print("ℹ️ No .pptx or .pdf files found in that folder.")
-        return
 
-    # Lazy import so script works even if PowerPoint/comtypes isn't installed
-    ppt = None
-    from pdf2image import convert_from_path
+def output_png(src: Path) -> Path:
+    return src.with_name(f"{src.stem}.png")
+
+
+def export_settings(dpi, pages=DEFAULT_PAGES, thumbnails=()) -> dict:
+    return {"dpi": dpi, "pages": pages, "thumbnails": sorted(thumbnails)}
+
+
+def is_current(entry, digest, settings: dict, src: Path) -> bool:
+    if not entry or entry.get("sha256") != digest:
+        return False
+    # Entries from before pages/thumbnails existed mean first page, no thumbnails
+    recorded = export_settings(entry.get("dpi"), entry.get("pages", DEFAULT_PAGES), entry.get("thumbnails", ()))
+    outputs = entry.get("outputs") or [output_png(src).name]
+    return recorded == settings and all((src.parent / name).exists() for name in outputs)
+
 
-    # --- Handle PPTX -> PNG (FIRST SLIDE ONLY)
-    if pptx_files:
+#%% PPTX -> PDF
+
+def find_soffice():
+    for cand in SOFFICE_CANDIDATES:
+        found = shutil.which(cand) or (cand if os.path.isfile(cand) else None)
+        if found:
+            return found
+    return None
+
+
+def pick_engine(engine: str):
+    """'powerpoint', 'libreoffice' or None (PPTX files are then skipped)."""
+    if engine in ("auto", "powerpoint") and sys.platform == "win32":
         try:
-            import comtypes.client
-            print("📑 Initializing PowerPoint…")
-            ppt = comtypes.client.CreateObject("PowerPoint.Application")
-            ppt.Visible = 1
-        except Exception as e:
-            print("❌ Could not initialize PowerPoint/comtypes. "
-                  "PPTX conversion will be skipped.\n   Details:", e)
-            pptx_files = []
+            import comtypes.client  # noqa: F401
+            return "powerpoint"
+        except ImportError:
+            if engine == "powerpoint":
+                print("❌ comtypes is not installed; PowerPoint export is unavailable.")
+                return None
+    elif engine == "powerpoint":
+        print("❌ PowerPoint export only works on Windows.")
+        return None
+    if find_soffice():
+        return "libreoffice"
+    print("❌ LibreOffice (soffice) not found; PPTX conversion will be skipped.")
+    return None
+
+
+def pptx_to_pdf_powerpoint(pptx_files, out_dir: Path):
+    """Yields (pptx, pdf or None, error) – one PowerPoint instance, one deck at a time."""
+    import comtypes.client
 
+    print("📑 Initializing PowerPoint…")
     try:
+        ppt = comtypes.client.CreateObject("PowerPoint.Application")
+        ppt.Visible = 1
+    except Exception as e:
         for pptx in pptx_files:
-            base = pptx.stem
-            tmp_pdf = pptx.with_name(f"{base}__export_tmp.pdf")
-
+            yield pptx, None, f"could not start PowerPoint: {e}"
+        return
+    try:
+        for pptx in pptx_files:
+            pdf = out_dir / f"{pptx.stem}.pdf"
             try:
-                print(f"➡️ Converting PPTX to PDF: {pptx.name}")
                 presentation = ppt.Presentations.Open(str(pptx))
-                presentation.SaveAs(str(tmp_pdf), 32)  # 32 = PDF
+                presentation.SaveAs(str(pdf), 32)  # 32 = PDF
                 presentation.Close()
-
-                print(f"   -> Exporting FIRST slide to PNG @ {dpi} DPI…")
-                images = convert_from_path(
-                    str(tmp_pdf), dpi=dpi, first_page=1, last_page=1
-                )
-                if images:
-                    out_png = pptx.with_name(f"{base}.png")
-                    images[0].save(str(out_png), "PNG")
-                    print(f"      ✅ Saved {out_png.name}")
-            finally:
-                # Clean up temp PDF
-                if tmp_pdf.exists():
-                    try:
-                        tmp_pdf.unlink()
-                    except Exception:
-                        pass
+                yield pptx, pdf, None
+            except Exception as e:
+                yield pptx, None, str(e)
     finally:
-        if ppt is not None:
-            ppt.Quit()
+        ppt.Quit()
+
+
+def _soffice_batch(soffice, batch, out_dir: Path, profile: Path):
+    # A private profile per process lets several soffice instances run at once
+    cmd = [soffice, f"-env:UserInstallation={profile.as_uri()}", "--headless", "--norestore",
+           "--convert-to", "pdf", "--outdir", str(out_dir), *map(str, batch)]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True,
+                              timeout=SOFFICE_TIMEOUT_PER_DECK * len(batch))
+        detail = (proc.stderr or proc.stdout).strip()
+    except (OSError, subprocess.TimeoutExpired) as e:
+        detail = str(e)
+    results = []
+    for pptx in batch:
+        pdf = out_dir / f"{pptx.stem}.pdf"
+        results.append((pptx, pdf, None) if pdf.exists() else
+                       (pptx, None, detail or "LibreOffice produced no PDF"))
+    return results
+
+
+def pptx_to_pdf_libreoffice(pptx_files, out_dir: Path, workers: int):
+    """Yields (pptx, pdf or None, error) as each soffice batch finishes."""
+    soffice = find_soffice()
+    workers = max(1, min(workers, len(pptx_files)))
+    batches = [pptx_files[i::workers] for i in range(workers)]
+    print(f"📑 Converting {len(pptx_files)} deck(s) with LibreOffice ({workers} process(es))…")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_soffice_batch, soffice, batch, out_dir / f"batch{i}", out_dir / f"profile{i}")
+                   for i, batch in enumerate(batches)]
+        for fut in as_completed(futures):
+            yield from fut.result()
+
+
+#%% PDF -> PNG
+
+def parse_pages(spec: str):
+    """'1', '2-5', '3-' or 'all' -> (first, last or None for the end)."""
+    spec = spec.strip().lower()
+    if spec == "all":
+        return 1, None
+    first, dash, last = spec.partition("-")
+    first = int(first)
+    last = int(last) if last else (None if dash else first)
+    if first < 1 or (last is not None and last < first):
+        raise ValueError(f"invalid page range {spec!r}")
+    return first, last
+
+
+def parse_sizes(spec: str):
+    """'256,1024' -> [256, 1024]; 'full' is the page itself and is ignored."""
+    return sorted({int(s) for s in spec.split(",") if s.strip() and s.strip().lower() != "full"})
+
+
+def page_png(base: Path, page: int, pages: str) -> Path:
+    return base.with_name(f"{base.name}.png" if pages == DEFAULT_PAGES else f"{base.name}_p{page:03d}.png")
+
+
+def write_thumbnails(png: Path, sizes):
+    """Smaller copies of `png` (longest side = size), each made from the previous, largest first."""
+    from PIL import Image
+
+    written = []
+    with Image.open(png) as im:
+        im.load()
+        for size in sorted(sizes, reverse=True):
+            im.thumbnail((size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+            out = png.with_name(f"{png.stem}_{size}px.png")
+            im.save(out, "PNG")
+            written.append(out.name)
+    return written
+
+
+def rasterize(pdf: str, base: str, dpi: int, pages=DEFAULT_PAGES, thumbnails=()):
+    """
+    Export `pages` of `pdf` as PNGs named after `base` (plus thumbnails).
+    Poppler writes the pages to a temp folder PAGE_CHUNK at a time; each is
+    moved into place and thumbnailed before the next chunk renders.
+    Returns the output file names. Runs in a worker process.
+    """
+    from pdf2image import convert_from_path, pdfinfo_from_path
+
+    base = Path(base)
+    first, last = parse_pages(pages)
+    count = pdfinfo_from_path(pdf)["Pages"]
+    last = min(last or count, count)
+    if first > last:
+        raise RuntimeError(f"page {first} is past the end ({count} page(s))")
+    outputs = []
+    with tempfile.TemporaryDirectory(prefix="pptxpng_pages_") as tmp:
+        for start in range(first, last + 1, PAGE_CHUNK):
+            end = min(start + PAGE_CHUNK - 1, last)
+            paths = convert_from_path(pdf, dpi=dpi, first_page=start, last_page=end,
+                                      output_folder=tmp, fmt="png", paths_only=True)
+            for page, path in zip(range(start, end + 1), paths):
+                out = page_png(base, page, pages)
+                shutil.move(path, out)
+                outputs.append(out.name)
+                outputs += write_thumbnails(out, thumbnails)
+    return outputs
+
+
+#%% Driver
+
+def convert_folder(folder: Path, dpi=DEFAULT_DPI, engine="auto", workers=0, force=False,
+                   pages=DEFAULT_PAGES, thumbnails=()):
+    """Convert every changed PPTX/PDF in `folder`; returns (converted, skipped, failed)."""
+    pptx_files = sorted(p for p in folder.iterdir() if p.suffix.lower() == ".pptx")
+    pdf_files = sorted(p for p in folder.iterdir() if p.suffix.lower() == ".pdf")
+    if not pptx_files and not pdf_files:
+        print("ℹ️ No .pptx or .pdf files found in that folder.")
+        return 0, 0, 0
+
+    # Skip what the manifest says is already up to date
+    manifest = {name: entry for name, entry in load_manifest(folder).items() if (folder / name).exists()}
+    settings = export_settings(dpi, pages, thumbnails)
+    todo, skipped = {}, 0
+    for src in pptx_files + pdf_files:
+        digest = file_hash(src)
+        if not force and is_current(manifest.get(src.name), digest, settings, src):
+            skipped += 1
+        else:
+            todo[src] = digest
+    if skipped:
+        print(f"⏭️ {skipped} file(s) unchanged since the last run.")
+    if not todo:
+        print("🎉 Done! Nothing to convert.")
+        return 0, skipped, 0
+
+    workers = workers or os.cpu_count() or 1
+    converted = failed = 0
+    with tempfile.TemporaryDirectory(prefix="pptxpng_") as tmp, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+
+        def submit(src, pdf):
+            what = "first page" if pages == DEFAULT_PAGES else f"pages {pages}"
+            print(f"➡️ Exporting {what} of {src.name} @ {dpi} DPI…")
+            futures[pool.submit(rasterize, str(pdf), str(src.with_suffix("")), dpi, pages, thumbnails)] = src
+
+        # PDFs start rasterizing right away, decks as soon as their PDF exists
+        for src in pdf_files:
+            if src in todo:
+                submit(src, src)
+        decks = [p for p in pptx_files if p in todo]
+        if decks:
+            chosen = pick_engine(engine)
+            if chosen == "powerpoint":
+                exported = pptx_to_pdf_powerpoint(decks, Path(tmp))
+            elif chosen == "libreoffice":
+                exported = pptx_to_pdf_libreoffice(decks, Path(tmp), workers)
+            else:
+                exported = ((p, None, "no PPTX converter available") for p in decks)
+            for pptx, pdf, error in exported:
+                if pdf is None:
+                    failed += 1
+                    print(f"   ❌ {pptx.name}: {error}")
+                else:
+                    submit(pptx, pdf)
+
+        try:
+            for fut in as_completed(futures):
+                src = futures[fut]
+                try:
+                    outputs = fut.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"   ❌ {src.name}: {e}")
+                    continue
+                converted += 1
+                manifest[src.name] = {"sha256": todo[src], **settings, "outputs": outputs}
+                more = f" (+{len(outputs) - 1} more)" if len(outputs) > 1 else ""
+                print(f"   ✅ Saved {outputs[0]}{more}")
+        finally:
+            save_manifest(folder, manifest)
+
+    print(f"🎉 Done! {converted} converted, {skipped} unchanged, {failed} failed.")
+    return converted, skipped, failed
+
+
+def ask_folder_and_dpi():
+    """The original interactive prompts, used when no folder is given."""
+    folder = input("Enter the folder path containing the PPTX/PDF files: ").strip().strip('"')
+    try:
+        dpi_str = input(f"DPI for PNG export (default {DEFAULT_DPI}): ").strip()
+        dpi = int(dpi_str) if dpi_str else DEFAULT_DPI
+    except ValueError:
+        print(f"⚠️ Invalid DPI; using {DEFAULT_DPI}.")
+        dpi = DEFAULT_DPI
+    return folder, dpi
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export pages of each PPTX/PDF in a folder as PNG")
+    parser.add_argument("folder", nargs="?", help="folder with .pptx/.pdf files (asked for if omitted)")
+    parser.add_argument("--dpi", type=int, default=None, help=f"PNG resolution (default {DEFAULT_DPI})")
+    parser.add_argument("--engine", choices=["auto", "powerpoint", "libreoffice"], default="auto",
+                        help="PPTX -> PDF converter (auto: PowerPoint on Windows if available, else LibreOffice)")
+    parser.add_argument("--workers", type=int, default=0, help="parallel processes (default: one per CPU)")
+    parser.add_argument("--pages", default=DEFAULT_PAGES,
+                        help="pages to export: 1 (default), 2-5, 3- or all")
+    parser.add_argument("--thumbnails", default="", metavar="SIZES",
+                        help="also write thumbnails, e.g. 256,1024 (longest side in pixels)")
+    parser.add_argument("--force", action="store_true", help="convert everything, ignoring the manifest")
+    args = parser.parse_args(argv)
+    try:
+        parse_pages(args.pages)
+        thumbnails = parse_sizes(args.thumbnails)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.folder:
+        folder, dpi = args.folder, args.dpi or DEFAULT_DPI
+    else:
+        folder, dpi = ask_folder_and_dpi()
+    if not os.path.isdir(folder):
+        print("❌ Invalid folder path. Please check and try again.")
+        sys.exit(1)
 
-    # --- Handle PDF -> PNG (FIRST PAGE ONLY)
-    for pdf in pdf_files:
-        base = pdf.stem
-        print(f"➡️ Converting first page of PDF: {pdf.name} @ {dpi} DPI…")
-        images = convert_from_path(str(pdf), dpi=dpi, first_page=1, last_page=1)
-        if images:
-            out_png = pdf.with_name(f"{base}.png")
-            images[0].save(str(out_png), "PNG")
-            print(f"   ✅ Saved {out_png.name}")
+    _, _, failed = convert_folder(Path(folder), dpi=dpi, engine=args.engine, workers=args.workers,
+                                  force=args.force, pages=args.pages.strip().lower(), thumbnails=thumbnails)
+    return 1 if failed else 0
 
-    print("🎉 Done!")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())